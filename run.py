@@ -4,14 +4,7 @@
 Entry point for the Bandit Wargame CLI application.
 """
 
-import sys
-import os
-
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
-
-from main import BanditCLIApp
+from src.main import main
 
 if __name__ == "__main__":
-    app = BanditCLIApp()
-    app.run()
\ No newline at end of file
+    main()
@@ -0,0 +1 @@
+"""Bandit Wargame CLI application."""
@@ -1,23 +1,69 @@
-import litellm
+import asyncio
+import hashlib
 import os
-import json
-import importlib
-from typing import List, Dict, Optional, Callable
-from datetime import datetime
+import functools
+from collections import OrderedDict, deque
+from types import MappingProxyType
+from typing import TYPE_CHECKING, List, Dict, Mapping, Optional, Callable, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from typing import Deque
+
+from . import json_utils
+from .prompts import SYSTEM_PROMPT
+
+# Conversations kept in memory; the least recently used session is dropped first
+MAX_SESSIONS = 32
+
+# Replies kept for repeated questions; the least recently used is dropped first
+MAX_CACHED_RESPONSES = 100
+
+DEFAULT_LEVEL_HINT = ("Think about what the level description is asking you to find or do. "
+                      "Break down the problem into smaller steps.")
+
+
+def __getattr__(name: str):
+    """Import litellm on first use; it is slow to import and only needed for requests."""
+    if name == "litellm":
+        import litellm
+        return litellm
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_mentor_data(data_file_path: str) -> Tuple[Mapping[str, str], Mapping[str, str]]:
+    """Parse the mentor data file once per process into read-only mappings."""
+    data = json_utils.load_resource(data_file_path)
+    return (MappingProxyType(data.get("level_hints", {})),
+            MappingProxyType(data.get("command_explanations", {})))
+
+
+@functools.lru_cache(maxsize=64)
+def _build_context(current_level: Optional[int], recent_commands: Tuple[str, ...],
+                   terminal_output: str) -> str:
+    """Format the context message for a turn; repeated contexts are formatted once."""
+    context_parts = []
+    if current_level is not None:
+        context_parts.append(f"Current level: Bandit Level {current_level}")
+    
+    if recent_commands:
+        context_parts.append(f"Recent commands: {', '.join(recent_commands)}")
+    
+    if terminal_output:
+        context_parts.append(f"Recent terminal output: {terminal_output}")
+    
+    if not context_parts:
+        return ""
+    return "Current context: " + "\n".join(context_parts)
 
-<<<<<<< HEAD
-from textual.app import Notify
-=======
-from cache import cache
 
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
 class BanditAIMentor:
     def __init__(self, notify_callback: Callable[[str, str], None], model: str = None, data_file_path: str = "ai_mentor_data.json"):
         self.notify = notify_callback
         self.model: str = model or os.getenv("OPENAI_MODEL", "ollama/llama3.2")
         self.data_file_path: str = data_file_path
-        self.level_hints: Dict[str, str] = {}
-        self.command_explanations: Dict[str, str] = {}
+        self.level_hints: Mapping[str, str] = {}
+        self.command_explanations: Mapping[str, str] = {}
         self._load_data()
 
         # LiteLLM can handle different providers, so we don't need a specific client instance.
@@ -26,50 +72,59 @@ class BanditAIMentor:
         # different model, they will set the appropriate environment variables.
         self.disabled = False
             
-        self.conversation_history: Dict[str, List[Dict[str, str]]] = {}
+        # Keep the last 10 exchanges (user + assistant message each) per session,
+        # for at most MAX_SESSIONS sessions
+        self.conversation_history: "OrderedDict[str, Deque[Dict[str, str]]]" = OrderedDict()
+
+        # Token usage reported by the provider for the last response, per session
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+        
+        # Complete replies keyed by (level, normalised question, recent commands digest)
+        self.response_cache: "OrderedDict[Tuple[int, str, bytes], str]" = OrderedDict()
         
         # System prompt for the AI mentor
-        self.system_prompt = """You are an AI mentor for the OverTheWire Bandit wargame, designed to help beginners learn cybersecurity and Linux command line skills. Your role is to provide guidance, hints, and educational context WITHOUT giving direct solutions.
-
-IMPORTANT RULES:
-1. NEVER provide the exact commands or solutions that solve the level
-2. NEVER reveal passwords or direct answers
-3. Instead, guide users toward understanding concepts and discovering solutions themselves
-4. Provide hints about what to look for or what concepts to research
-5. Explain relevant Linux commands and their purposes in general terms
-6. Encourage experimentation and learning from mistakes
-7. Ask leading questions that help users think through problems
-8. Provide context about cybersecurity concepts when relevant
-
-RESPONSE STYLE:
-- Be encouraging and supportive
-- Use a friendly, mentor-like tone
-- Break down complex concepts into digestible pieces
-- Provide examples of command usage in general contexts (not specific to the current level)
-- Reference learning materials and documentation when helpful
-
-CONTEXT AWARENESS:
-- Pay attention to the current level the user is working on
-- Consider their recent terminal commands and output
-- Adapt explanations to their apparent skill level
-- Build on previous conversations and learning progress
-
-Remember: Your goal is to teach and guide, not to solve problems for the user. Help them become better problem solvers and Linux users."""
+        self.system_prompt = SYSTEM_PROMPT
+
+    @functools.cached_property
+    def _system_msg(self) -> Dict:
+        """System message reused as-is on every request, built on first use."""
+        from litellm.utils import supports_prompt_caching
+
+        message = {"role": "system", "content": self.system_prompt}
+        if supports_prompt_caching(self.model):
+            # Let providers that support it cache the prompt prefix
+            message["cache_control"] = {"type": "ephemeral"}
+        return message
+
+    @staticmethod
+    def _response_key(current_level: int, user_message: str,
+                      recent_commands: Optional[Sequence[str]]) -> Tuple[int, str, bytes]:
+        """Key a reply by level, question and the commands the user just ran."""
+        commands_digest = hashlib.blake2b(
+            "\n".join(recent_commands or ()).encode(), digest_size=8
+        ).digest()
+        return (current_level, user_message.strip().lower(), commands_digest)
+
+    def get_cached_response(self, user_message: str, current_level: int = 0,
+                            recent_commands: Sequence[str] = None) -> Optional[str]:
+        """Return an earlier reply to the same question in the same context, if any"""
+        key = self._response_key(current_level, user_message, recent_commands)
+        response = self.response_cache.get(key)
+        if response is not None:
+            self.response_cache.move_to_end(key)
+        return response
 
     def _load_data(self):
         """Load data from the JSON file."""
         try:
-            with importlib.resources.open_text("src", self.data_file_path) as f:
-                data = json.load(f)
-                self.level_hints = data.get("level_hints", {})
-                self.command_explanations = data.get("command_explanations", {})
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            self.level_hints, self.command_explanations = _load_mentor_data(self.data_file_path)
+        except (FileNotFoundError, json_utils.JSONDecodeError) as e:
             self.notify(f"Error loading AI mentor data: {e}", "error")
             self.level_hints = {}
             self.command_explanations = {}
 
     def get_response(self, user_message: str, session_id: str = "default", 
-                    current_level: int = 0, recent_commands: List[str] = None,
+                    current_level: int = 0, recent_commands: Sequence[str] = None,
                     terminal_output: str = ""):
         """Generate AI mentor response"""
         # If AI is disabled, return a default message
@@ -77,38 +132,42 @@ Remember: Your goal is to teach and guide, not to solve problems for the user. H
             yield "AI mentor is currently disabled. Please set your OpenAI API key in the .env file to enable this feature."
             return
         
+        import litellm
+        
         try:
             # Initialize conversation history for new sessions
-            if session_id not in self.conversation_history:
-                self.conversation_history[session_id] = []
-            
-            # Build context message
-            context_parts = []
-            if current_level is not None:
-                context_parts.append(f"Current level: Bandit Level {current_level}")
-            
-            if recent_commands:
-                context_parts.append(f"Recent commands: {', '.join(recent_commands[-5:])}")
-            
-            if terminal_output:
-                # Limit terminal output to avoid token limits
-                limited_output = terminal_output[-500:] if len(terminal_output) > 500 else terminal_output
-                context_parts.append(f"Recent terminal output: {limited_output}")
+            history = self.conversation_history.get(session_id)
+            if history is None:
+                history = self.conversation_history[session_id] = deque(maxlen=20)
+                if len(self.conversation_history) > MAX_SESSIONS:
+                    evicted, _ = self.conversation_history.popitem(last=False)
+                    self.token_usage.pop(evicted, None)
+            else:
+                self.conversation_history.move_to_end(session_id)
             
-            context_message = "\n".join(context_parts) if context_parts else ""
+            # Repeated questions are answered from the cache without a request
+            cached = self.get_cached_response(user_message, current_level, recent_commands)
+            if cached is not None:
+                history.append({"role": "user", "content": user_message})
+                history.append({"role": "assistant", "content": cached})
+                yield cached
+                return
             
-            # Prepare messages for the API
-            messages = [{"role": "system", "content": self.system_prompt}]
+            # Build context message from the last few commands and output
+            context_message = _build_context(
+                current_level,
+                tuple(recent_commands)[-5:] if recent_commands else (),
+                terminal_output[-500:] if terminal_output else ""
+            )
             
-            # Add conversation history (limit to last 10 exchanges)
-            recent_history = self.conversation_history[session_id][-10:]
-            messages.extend(recent_history)
+            # Prepare messages for the API: system prompt followed by the bounded history
+            messages = [self._system_msg, *history]
             
             # Add context if available
             if context_message:
                 messages.append({
                     "role": "system", 
-                    "content": f"Current context: {context_message}"
+                    "content": context_message
                 })
             
             # Add user message
@@ -120,22 +179,42 @@ Remember: Your goal is to teach and guide, not to solve problems for the user. H
                 messages=messages,
                 max_tokens=500,
                 temperature=0.7,
-                stream=True
+                stream=True,
+                stream_options={"include_usage": True}
             )
             
-            full_response = ""
+            # Hand each delta to the caller as soon as it arrives
+            parts = []
             for chunk in stream:
-                content = chunk.choices[0].delta.content or ""
-                if content:
-                    full_response += content
-                    yield content
+                if chunk.choices:
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        parts.append(content)
+                        yield content
+                
+                # The final chunk carries the token counts for the whole exchange
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    self.token_usage[session_id] = {
+                        "prompt_tokens": usage.prompt_tokens,
+                        "completion_tokens": usage.completion_tokens,
+                        "total_tokens": usage.total_tokens
+                    }
+            
+            full_response = "".join(parts)
+            
+            if full_response:
+                key = self._response_key(current_level, user_message, recent_commands)
+                self.response_cache[key] = full_response
+                if len(self.response_cache) > MAX_CACHED_RESPONSES:
+                    self.response_cache.popitem(last=False)
             
             # Update conversation history
-            self.conversation_history[session_id].append({
+            history.append({
                 "role": "user", 
                 "content": user_message
             })
-            self.conversation_history[session_id].append({
+            history.append({
                 "role": "assistant", 
                 "content": full_response
             })
@@ -147,75 +226,57 @@ Remember: Your goal is to teach and guide, not to solve problems for the user. H
             self.notify(f"Error generating AI response: {e}", "error")
             yield "I'm sorry, I'm having trouble responding right now. Please try again later."
     
+    async def abatch(self, messages_list: List[List[Dict[str, str]]]) -> List[str]:
+        """Run several completions concurrently and return the replies in order"""
+        import litellm
+        
+        tasks = [
+            asyncio.create_task(litellm.acompletion(
+                model=self.model,
+                messages=messages,
+                max_tokens=500,
+                temperature=0.7
+            ))
+            for messages in messages_list
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        responses = []
+        for result in results:
+            if isinstance(result, Exception):
+                self.notify(f"Error generating AI response: {result}", "error")
+                responses.append("I'm sorry, I'm having trouble responding right now. Please try again later.")
+            else:
+                responses.append(result.choices[0].message.content or "")
+        return responses
+    
+    def batch_get_response(self, prompts: List[str]) -> List[str]:
+        """Get independent mentor replies for several prompts in parallel.
+        
+        The prompts do not share conversation history. Every request starts with
+        the same system message so providers can reuse the cached prompt prefix.
+        Call abatch() directly when already running inside an event loop.
+        """
+        if self.disabled:
+            return ["AI mentor is currently disabled. Please set your OpenAI API key in the .env file to enable this feature."] * len(prompts)
+        
+        messages_list = [
+            [self._system_msg, {"role": "user", "content": prompt}]
+            for prompt in prompts
+        ]
+        return asyncio.run(self.abatch(messages_list))
+    
     def clear_conversation(self, session_id: str = "default"):
         """Clear conversation history for a session"""
         if session_id in self.conversation_history:
             del self.conversation_history[session_id]
+        self.token_usage.pop(session_id, None)
     
     def get_level_hint(self, level_num: int) -> str:
         """Get a general hint for a specific level without spoilers"""
-<<<<<<< HEAD
-        return self.level_hints.get(str(level_num),
-=======
-        # Try to get from cache first
-        cache_key = f"level_hint_{level_num}"
-        cached_hint = cache.get(cache_key)
-        if cached_hint is not None:
-            return cached_hint
-        
-        level_hints = {
-            0: "This level is about connecting to the game server using SSH. Think about what information you need to establish a secure connection.",
-            1: "Look for files in your current directory. What commands can help you see what's available?",
-            2: "Sometimes files have unusual names that make them tricky to access. How do you handle special characters in filenames?",
-            3: "Hidden files in Linux start with a dot. How can you see all files, including hidden ones?",
-            4: "When you have many files, you might need to examine their contents or properties to find what you're looking for.",
-            5: "File properties like size, permissions, and type can help you identify the right file among many options.",
-        }
-        
-        hint = level_hints.get(level_num, 
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
-            "Think about what the level description is asking you to find or do. Break down the problem into smaller steps.")
-        
-        # Cache the result for 1 hour
-        cache.set(cache_key, hint, ttl=3600)
-        
-        return hint
-    
-    import hashlib
+        return self.level_hints.get(str(level_num), DEFAULT_LEVEL_HINT)
 
     def explain_command(self, command: str) -> str:
         """Provide educational explanation of a command"""
-<<<<<<< HEAD
         return self.command_explanations.get(command.lower(),
             f"'{command}' is a Linux command. Try 'man {command}' to learn more about it.")
-=======
-        # Try to get from cache first
-        command_hash = hashlib.sha256(command.encode('utf-8')).hexdigest()
-        cache_key = f"command_explanation_{command_hash}"
-        cached_explanation = cache.get(cache_key)
-        if cached_explanation is not None:
-            return cached_explanation
-        
-        command_explanations = {
-            "ls": "Lists directory contents. Try 'ls -la' to see all files including hidden ones with detailed information.",
-            "cat": "Displays file contents. Use it to read text files.",
-            "cd": "Changes directory. 'cd ..' goes up one level, 'cd ~' goes to home directory.",
-            "pwd": "Shows your current directory path.",
-            "find": "Searches for files and directories. Very powerful with many options for filtering.",
-            "grep": "Searches for text patterns within files.",
-            "file": "Determines file type. Useful when file extensions are misleading or missing.",
-            "du": "Shows disk usage. Can help find files by size.",
-            "ssh": "Secure Shell - used to connect to remote systems securely.",
-        }
-        
-        explanation = command_explanations.get(command.lower(), 
-            f"'{command}' is a Linux command. Try 'man {command}' to learn more about it.")
-        
-        # Cache the result for 1 hour
-        cache.set(cache_key, explanation, ttl=3600)
-        
-        return explanation
-
-# Global instance
-ai_mentor = BanditAIMentor()
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
@@ -1,28 +1,76 @@
-"""Command history management for the Bandit CLI application."""
-import json
+"""Command history management for the Bandit CLI application.
+
+History is stored as JSON lines, oldest first, so saving a new command only
+appends to the file; the file is compacted once it grows past twice the
+history size.
+"""
+import atexit
 import os
-from typing import List, Optional
+import threading
+import weakref
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Set, Tuple
+
+from . import json_utils
+
+# History files larger than this are ignored rather than loaded
+MAX_HISTORY_FILE_BYTES = 1024 * 1024
+
+# Histories whose pending changes are written at exit; weak so they can still be freed
+_live_histories: "weakref.WeakSet[CommandHistory]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_histories():
+    """Make sure pending history changes reach disk on shutdown."""
+    for history in list(_live_histories):
+        history.flush()
 
 
 class CommandHistory:
     """Manages command history with persistence."""
     
-    def __init__(self, max_size: int = 100, history_file: str = None):
+    def __init__(self, max_size: int = 100, history_file: str = None, save_delay: float = 2.0,
+                 lazy: bool = False):
         """
         Initialize command history manager.
         
         Args:
             max_size: Maximum number of commands to store
             history_file: Path to file for persistent storage
+            save_delay: Seconds to wait after the last change before writing to disk
+            lazy: If True, don't read the history file here; the caller loads it later
+                with read_history_file() and merge_commands()
         """
         self.max_size = max_size
         self.history_file = history_file
-        self.commands: List[str] = []
+        self.save_delay = save_delay
+        # Most recent first; _seen mirrors the contents for O(1) duplicate checks
+        self.commands: Deque[str] = deque(maxlen=max_size)
+        self._seen: Set[str] = set()
         self.index = -1
+        # Tuple copy of the history taken when navigation starts, for O(1) indexing
+        self._snapshot: Tuple[str, ...] = ()
+        
+        # Pending-write state for debounced saves
+        self._dirty = False
+        # Commands added since the last write, oldest first
+        self._unsaved: List[str] = []
+        # Lines in the history file, or None when it must be rewritten in full.
+        # The first write of a session compacts the file (and converts old JSON list files)
+        self._file_lines: Optional[int] = None
+        self._save_timer: Optional[threading.Timer] = None
+        # Guards the history and pending-write state, which the delayed save reads on a timer thread
+        self._lock = threading.Lock()
+        # Serialises file writes; held without _lock so adding commands never waits on disk
+        self._write_lock = threading.Lock()
         
         # Load history from file if specified
         if self.history_file:
-            self.load_history()
+            if not lazy:
+                self.load_history()
+            _live_histories.add(self)
     
     def add_command(self, command: str):
         """
@@ -34,23 +82,28 @@ class CommandHistory:
         if not command or not command.strip():
             return
             
-        # Remove duplicates
-        if command in self.commands:
-            self.commands.remove(command)
-            
-        # Add to beginning of list
-        self.commands.insert(0, command.strip())
+        command = command.strip()
         
-        # Limit size
-        if len(self.commands) > self.max_size:
-            self.commands = self.commands[:self.max_size]
+        with self._lock:
+            if command in self._seen:
+                # Remove the older duplicate
+                self.commands.remove(command)
+            elif len(self.commands) == self.max_size:
+                # Make room by dropping the oldest command
+                self._seen.discard(self.commands.pop())
+                
+            # Add to beginning of history
+            self.commands.appendleft(command)
+            self._seen.add(command)
+            if self.history_file:
+                self._unsaved.append(command)
             
         # Reset index
         self.index = -1
         
-        # Save to file if specified
+        # Schedule a save if persistence is enabled
         if self.history_file:
-            self.save_history()
+            self._schedule_save()
     
     def get_previous_command(self) -> Optional[str]:
         """
@@ -59,12 +112,15 @@ class CommandHistory:
         Returns:
             Previous command or None if at beginning
         """
-        if not self.commands:
+        if self.index == -1:
+            # Starting to navigate; later key presses index this copy
+            self._snapshot = tuple(self.commands)
+        if not self._snapshot:
             return None
             
-        if self.index < len(self.commands) - 1:
+        if self.index < len(self._snapshot) - 1:
             self.index += 1
-            return self.commands[self.index]
+            return self._snapshot[self.index]
         return None
     
     def get_next_command(self) -> Optional[str]:
@@ -74,12 +130,12 @@ class CommandHistory:
         Returns:
             Next command or None if at end
         """
-        if not self.commands:
+        if self.index == -1 or not self._snapshot:
             return None
             
         if self.index > 0:
             self.index -= 1
-            return self.commands[self.index]
+            return self._snapshot[self.index]
         elif self.index == 0:
             self.index = -1
             return ""
@@ -89,47 +145,195 @@ class CommandHistory:
         """Reset the history index."""
         self.index = -1
     
+    def _schedule_save(self):
+        """Mark history as changed and (re)arm the delayed save."""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write pending changes to file immediately."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            rewrite = (self._file_lines is None
+                       or self._file_lines + len(self._unsaved) > 2 * self.max_size)
+        if rewrite:
+            self.save_history()
+        else:
+            self._append_unsaved()
+    
+    @staticmethod
+    def _encode(commands) -> bytes:
+        """Encode commands as JSON lines."""
+        return b"".join(json_utils.dumps(command) + b"\n" for command in commands)
+    
+    def _take_unsaved(self) -> List[str]:
+        """Hand over the commands not yet written; the caller holds _lock."""
+        pending, self._unsaved = self._unsaved, []
+        return pending
+    
+    def _restore_unsaved(self, pending: List[str]):
+        """Put back commands whose write failed so the next save retries them."""
+        with self._lock:
+            self._unsaved[:0] = pending
+            self._dirty = True
+    
+    def _append_unsaved(self):
+        """Append commands added since the last write to the history file."""
+        with self._write_lock:
+            with self._lock:
+                pending = self._take_unsaved()
+            if not pending:
+                return
+            try:
+                with open(self.history_file, 'ab') as f:
+                    f.write(self._encode(pending))
+            except Exception as e:
+                self._restore_unsaved(pending)
+                print(f"Warning: Could not save command history: {e}")
+                return
+            with self._lock:
+                # A merge in the meantime already asked for a full rewrite
+                if self._file_lines is not None:
+                    self._file_lines += len(pending)
+    
     def save_history(self):
-        """Save history to file."""
+        """Rewrite the history file with just the current history."""
         if not self.history_file:
             return
             
-        try:
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-            
-            with open(self.history_file, 'w') as f:
-                json.dump(self.commands, f)
-        except Exception as e:
-            print(f"Warning: Could not save command history: {e}")
+        with self._write_lock:
+            with self._lock:
+                commands = tuple(self.commands)
+                pending = self._take_unsaved()
+            try:
+                # Create directory if it doesn't exist
+                os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+                
+                # Write to a temporary file and swap it in so a crash never leaves a torn file
+                tmp_file = f"{self.history_file}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(self._encode(reversed(commands)))
+                os.replace(tmp_file, self.history_file)
+            except Exception as e:
+                self._restore_unsaved(pending)
+                print(f"Warning: Could not save command history: {e}")
+                return
+            with self._lock:
+                # Commands added since the copy are in _unsaved and go out with the next append
+                self._file_lines = len(commands)
     
     def load_history(self):
         """Load history from file."""
-        if not self.history_file or not os.path.exists(self.history_file):
-            return
+        self.merge_commands(self.read_history_file())
+    
+    def read_history_file(self) -> List[str]:
+        """
+        Read saved commands from the history file without changing this history.
+        
+        Only touches the file, so it is safe to call from a worker thread.
+        
+        Returns:
+            Saved commands, most recent first, or an empty list if none could be read
+        """
+        if not self.history_file:
+            return []
             
+        path = Path(self.history_file)
         try:
-            with open(self.history_file, 'r') as f:
-                self.commands = json.load(f)
+            if not path.exists():
+                return []
+            if path.stat().st_size > MAX_HISTORY_FILE_BYTES:
+                print(f"Warning: Command history file is too large, ignoring: {path}")
+                return []
+                
+            data = path.read_bytes()
+            if data.lstrip().startswith(b"["):
+                # Older files hold a single JSON list, most recent first
+                commands = json_utils.loads(data)
+            else:
+                commands = []
+                seen = set()
+                for line in reversed(data.splitlines()):
+                    try:
+                        command = json_utils.loads(line)
+                    except ValueError:
+                        # Skip blank or partly written lines
+                        continue
+                    if isinstance(command, str) and command not in seen:
+                        seen.add(command)
+                        commands.append(command)
                 
-            # Limit size
-            if len(self.commands) > self.max_size:
-                self.commands = self.commands[:self.max_size]
+            # Limit size, keeping the most recent commands
+            return [command for command in commands[:self.max_size] if isinstance(command, str)]
         except Exception as e:
             print(f"Warning: Could not load command history: {e}")
+            return []
     
-    def get_all_commands(self) -> List[str]:
+    def merge_commands(self, commands: List[str]):
+        """
+        Add previously saved commands behind the ones already in history.
+        
+        Commands entered since startup stay the most recent; saved duplicates of
+        them are skipped.
+        
+        Args:
+            commands: Saved commands, most recent first
+        """
+        with self._lock:
+            for command in commands:
+                if len(self.commands) == self.max_size:
+                    break
+                if command not in self._seen:
+                    self.commands.append(command)
+                    self._seen.add(command)
+            
+            # Commands entered before the merge may already have rewritten the file
+            # without the older ones, so make the next write a full one
+            rewrite = self._file_lines is not None and bool(self.history_file)
+            if rewrite:
+                self._file_lines = None
+        if rewrite:
+            self._schedule_save()
+    
+    def get_all_commands(self) -> Tuple[str, ...]:
         """
         Get all commands in history.
         
         Returns:
-            List of all commands
+            Snapshot of all commands, newest first
+        """
+        return tuple(self.commands)
+    
+    def iter_commands(self) -> Iterator[str]:
+        """
+        Iterate over commands without copying them.
+        
+        The history must not change while the iterator is in use.
+        
+        Returns:
+            Iterator over commands, newest first
         """
-        return self.commands.copy()
+        return iter(self.commands)
     
     def clear_history(self):
         """Clear all command history."""
-        self.commands = []
+        with self._lock:
+            self.commands.clear()
+            self._seen.clear()
+            self._unsaved.clear()
+            if self.history_file:
+                self._file_lines = None
+                self._dirty = True
         self.index = -1
         if self.history_file:
-            self.save_history()
\ No newline at end of file
+            self.flush()
\ No newline at end of file
@@ -1,9 +1,20 @@
 """Configuration management for the Bandit CLI application."""
+import contextlib
 import os
-import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
-import copy
+import functools
+
+from . import json_utils
+
+# Marks a key path that does not resolve to a value
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=128)
+def _split_key(key_path: str) -> Tuple[str, ...]:
+    """Split a dot-separated key path once and reuse the result."""
+    return tuple(key_path.split('.'))
 
 
 class ConfigManager:
@@ -29,7 +40,10 @@ class ConfigManager:
             "ssh": {
                 "host": "bandit.labs.overthewire.org",
                 "port": 2220,
-                "timeout": 10
+                "timeout": 10,
+                "pool_size": 4,
+                "keepalive_interval": 30,
+                "send_delay": 0.001
             },
             "ui": {
                 "theme": "dark",
@@ -43,13 +57,18 @@ class ConfigManager:
             "history": {
                 "max_commands": 100,
                 "persist": True
-            },
-            "cache": {
-                "enable": True,
-                "path": str(Path.home() / ".bandit_cli" / "cache")
             }
         }
         
+        # Resolved values by key path, cleared whenever the config changes
+        self._resolved: Dict[str, Any] = {}
+        
+        # Bytes last written to the config file, to skip saves that change nothing
+        self._saved_payload: Optional[bytes] = None
+        # Nesting depth of batch() blocks, and whether a save was put off by one
+        self._batch_depth = 0
+        self._save_pending = False
+        
         # Load configuration
         self.config = self.load_config()
     
@@ -61,13 +80,13 @@ class ConfigManager:
             Configuration dictionary
         """
         # Start with default config
-        config = copy.deepcopy(self.default_config)
+        config = self._fresh_defaults()
         
         # Load from file if it exists
         if self.config_file.exists():
             try:
-                with open(self.config_file, 'r') as f:
-                    file_config = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    file_config = json_utils.loads(f.read())
                 # Merge with default config
                 config = self._merge_config(config, file_config)
             except Exception as e:
@@ -75,9 +94,22 @@ class ConfigManager:
         
         return config
     
+    def _fresh_defaults(self) -> Dict[str, Any]:
+        """
+        Copy the default configuration.
+        
+        The defaults are one level of sections holding plain values, so copying
+        each section is enough to keep later changes away from default_config.
+        
+        Returns:
+            Copy of the default configuration
+        """
+        return {key: dict(value) if isinstance(value, dict) else value
+                for key, value in self.default_config.items()}
+    
     def _merge_config(self, default: Dict, override: Dict) -> Dict:
         """
-        Recursively merge two configuration dictionaries.
+        Merge two configuration dictionaries.
         
         Args:
             default: Default configuration
@@ -87,24 +119,59 @@ class ConfigManager:
             Merged configuration
         """
         merged = default.copy()
-        for key, value in override.items():
-            if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-                merged[key] = self._merge_config(merged[key], value)
-            else:
-                merged[key] = value
+        stack = [(merged, override)]
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                current = target.get(key)
+                if isinstance(current, dict) and isinstance(value, dict):
+                    # Copy the nested section before merging into it
+                    target[key] = current.copy()
+                    stack.append((target[key], value))
+                else:
+                    target[key] = value
         return merged
     
     def save_config(self):
         """Save current configuration to file."""
+        if self._batch_depth:
+            self._save_pending = True
+            return
+        
         try:
+            payload = json_utils.dumps(self.config, indent=True, sort_keys=True)
+            if payload == self._saved_payload:
+                return
+            
             # Create directory if it doesn't exist
             self.config_file.parent.mkdir(exist_ok=True)
             
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            # Write to a temporary file and swap it in so a crash never leaves a torn file
+            tmp_file = self.config_file.with_suffix(".tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_file, self.config_file)
+            self._saved_payload = payload
         except Exception as e:
             print(f"Warning: Could not save config file: {e}")
     
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Defer saving until the block exits, so several set() calls write once.
+        
+        Yields:
+            None
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._save_pending:
+                self._save_pending = False
+                self.save_config()
+    
     def get(self, key_path: str, default: Any = None) -> Any:
         """
         Get a configuration value using dot notation.
@@ -116,15 +183,28 @@ class ConfigManager:
         Returns:
             Configuration value or default
         """
-        keys = key_path.split('.')
-        value = self.config
+        value = self._resolved.get(key_path, _MISSING)
+        if value is _MISSING:
+            value = self._resolve(key_path)
+            self._resolved[key_path] = value
+        return default if value is _MISSING else value
+    
+    def _resolve(self, key_path: str) -> Any:
+        """
+        Walk the configuration along a key path.
         
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
-            return default
+        Args:
+            key_path: Dot-separated path to configuration value
+            
+        Returns:
+            Configuration value or _MISSING if the path does not exist
+        """
+        value = self.config
+        for key in _split_key(key_path):
+            if not isinstance(value, dict) or key not in value:
+                return _MISSING
+            value = value[key]
+        return value
     
     def set(self, key_path: str, value: Any):
         """
@@ -134,7 +214,7 @@ class ConfigManager:
             key_path: Dot-separated path to configuration value (e.g., "ssh.port")
             value: Value to set
         """
-        keys = key_path.split('.')
+        keys = _split_key(key_path)
         config = self.config
         
         # Navigate to the parent of the target key
@@ -145,11 +225,13 @@ class ConfigManager:
         
         # Set the value
         config[keys[-1]] = value
+        self._resolved.clear()
         
         # Save to file
         self.save_config()
     
     def reset_to_default(self):
         """Reset configuration to default values."""
-        self.config = copy.deepcopy(self.default_config)
+        self.config = self._fresh_defaults()
+        self._resolved.clear()
         self.save_config()
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""JSON helpers for the Bandit CLI application.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both paths read from and write to UTF-8 encoded bytes.
+"""
+import functools
+import importlib.resources
+import json
+import mmap
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one type covers both.
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[bytes, memoryview, str]) -> Any:
+    """
+    Parse a JSON document.
+
+    Args:
+        data: JSON document as bytes, memoryview or str
+
+    Returns:
+        Parsed Python object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize an object to JSON.
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with two-space indentation
+        sort_keys: Sort dictionary keys
+
+    Returns:
+        UTF-8 encoded JSON document
+    """
+    if orjson is not None:
+        option = 0
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def load_resource(name: str, package: str = __package__) -> Any:
+    """
+    Parse a JSON data file shipped with the package, once per process.
+
+    The file is memory-mapped so repeated starts are served from the OS page cache.
+    Callers share the returned object and must treat it as read-only.
+
+    Args:
+        name: File name relative to the package
+        package: Package containing the file
+
+    Returns:
+        Parsed Python object
+    """
+    if hasattr(importlib.resources, "files"):
+        location = importlib.resources.as_file(importlib.resources.files(package).joinpath(name))
+    else:
+        # Python 3.8 only has the older path() API
+        location = importlib.resources.path(package, name)
+    with location as path, open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and some file systems cannot be mapped; read them instead
+            return loads(f.read())
+        with mm, memoryview(mm) as view:
+            return loads(view)
@@ -1,49 +1,45 @@
-import json
-import os
-from typing import Dict, List, Optional, Callable
-import importlib.resources
+import functools
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Callable
+
+from . import json_utils
+
+
+@functools.lru_cache(maxsize=4)
+def _load_levels(levels_file_path: str) -> Mapping[int, Dict]:
+    """Parse a levels file once per process into a read-only mapping keyed by level number."""
+    levels = json_utils.load_resource(levels_file_path)
+    return MappingProxyType({int(level): info for level, info in levels.items()})
 
-<<<<<<< HEAD
-from textual.app import Notify
-=======
-from cache import cache
 
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
 class BanditLevelInfo:
+    __slots__ = ("levels_file_path", "notify", "levels_data", "max_level", "_formatted")
+    
     def __init__(self, levels_file_path: str = "bandit_levels.json", notify_callback: Callable[[str, str], None] = None):
         self.levels_file_path = levels_file_path
         self.notify = notify_callback
         self.levels_data = self._load_levels_data()
+        # Highest level number; the level set doesn't change after loading
+        self.max_level = max(self.levels_data, default=0)
+        # Formatted level text already produced by this instance, by level number
+        self._formatted: Dict[int, str] = {}
     
-    def _load_levels_data(self) -> Dict:
+    def _load_levels_data(self) -> Mapping[int, Dict]:
         """Load level data from JSON file"""
+        # ValueError covers malformed JSON as well as non-numeric level keys
         try:
-            with importlib.resources.open_text("src", self.levels_file_path) as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            return _load_levels(self.levels_file_path)
+        except (FileNotFoundError, ValueError) as e:
             if self.notify:
                 self.notify(f"Error loading level data: {e}", "error")
             return {}
     
     def get_level_info(self, level_num: int) -> Optional[Dict]:
         """Get information for a specific level"""
-        # Try to get from cache first
-        cache_key = f"level_info_{level_num}"
-        cached_info = cache.get(cache_key)
-        if cached_info is not None:
-            return cached_info
-        
-        # If not in cache, get from data and cache it
-        level_key = str(level_num)
-        level_info = self.levels_data.get(level_key)
-        
-        # Cache the result for 1 hour
-        if level_info is not None:
-            cache.set(cache_key, level_info, ttl=3600)
-        
-        return level_info
+        # levels_data is already an in-memory mapping; a lookup beats any cache
+        return self.levels_data.get(level_num)
     
-    def get_all_levels(self) -> Dict:
+    def get_all_levels(self) -> Mapping[int, Dict]:
         """Get information for all levels"""
         return self.levels_data
     
@@ -67,45 +63,43 @@ class BanditLevelInfo:
     
     def format_level_info(self, level_num: int) -> str:
         """Format level information as a readable string"""
-        # Try to get from cache first
-        cache_key = f"formatted_level_info_{level_num}"
-        cached_info = cache.get(cache_key)
-        if cached_info is not None:
-            return cached_info
+        # Levels shown before are returned as formatted the first time
+        if (formatted_info := self._formatted.get(level_num)) is not None:
+            return formatted_info
         
         level_info = self.get_level_info(level_num)
         if not level_info:
             return f"Level {level_num} information not available"
         
-        formatted_info = f"# Bandit Level {level_num}\n\n"
+        parts = [f"# Bandit Level {level_num}\n\n"]
         
         # Add goal
         goal = level_info.get("goal", "")
         if goal:
-            formatted_info += f"## Goal\n{goal}\n\n"
+            parts.append(f"## Goal\n{goal}\n\n")
         
         # Add recommended commands
         commands = level_info.get("commands", [])
         if commands:
-            formatted_info += f"## Recommended Commands\n"
-            for command in commands:
-                formatted_info += f"- {command}\n"
-            formatted_info += "\n"
+            parts.append("## Recommended Commands\n")
+            parts.extend(f"- {command}\n" for command in commands)
+            parts.append("\n")
         
         # Add reading materials
         materials = level_info.get("reading_material", [])
         if materials:
-            formatted_info += f"## Reading Materials\n"
+            parts.append("## Reading Materials\n")
             for material in materials:
                 title = material.get("title", "")
                 url = material.get("url", "")
                 if title and url:
-                    formatted_info += f"- [{title}]({url})\n"
+                    parts.append(f"- [{title}]({url})\n")
                 elif title:
-                    formatted_info += f"- {title}\n"
-            formatted_info += "\n"
+                    parts.append(f"- {title}\n")
+            parts.append("\n")
+        
+        formatted_info = "".join(parts)
         
-        # Cache the result for 1 hour
-        cache.set(cache_key, formatted_info, ttl=3600)
+        self._formatted[level_num] = formatted_info
         
         return formatted_info
\ No newline at end of file
@@ -1,55 +1,71 @@
+import codecs
 import os
-from dotenv import load_dotenv
+from functools import cached_property
+from collections import deque
+from typing import ClassVar, Dict
+from textual import work
+from textual.worker import get_current_worker
 from textual.app import App
-from textual.widgets import Header, Footer, TabbedContent, TabPane, TextArea, Input, Button, Label, LoadingIndicator
+from textual.widgets import Header, Footer, TabbedContent, TabPane, TextArea, Log, Input, Button, Label, LoadingIndicator
 from textual.containers import Container, Horizontal, Vertical
 from textual.reactive import reactive
 from textual.binding import Binding
 from textual.message import Message
-from textual.events import Key
 
 
 class CommandInput(Input):
     """Custom Input widget with command history support."""
     
+    BINDINGS = [
+        Binding("up", "history_prev", show=False),
+        Binding("down", "history_next", show=False),
+    ]
+    
     def __init__(self, command_history, **kwargs):
         super().__init__(**kwargs)
         self.command_history = command_history
     
-    def on_key(self, event: Key) -> None:
-        """Handle key presses."""
-        if event.key == "up":
-            previous_command = self.command_history.get_previous_command()
-            if previous_command is not None:
-                self.value = previous_command
-                self.cursor_position = len(self.value)
-                event.prevent_default()
-        elif event.key == "down":
-            next_command = self.command_history.get_next_command()
-            if next_command is not None:
-                self.value = next_command
-                self.cursor_position = len(self.value)
-                event.prevent_default()
-        elif event.key == "enter":
-            # Reset history index when user types a new command
-            self.command_history.reset_index()
+    def _show_command(self, command) -> None:
+        """Replace the input with a command from history, if there is one."""
+        if command is not None:
+            self.value = command
+            self.cursor_position = len(self.value)
+    
+    def action_history_prev(self) -> None:
+        """Show the previous command in history."""
+        self._show_command(self.command_history.get_previous_command())
+    
+    def action_history_next(self) -> None:
+        """Show the next command in history."""
+        self._show_command(self.command_history.get_next_command())
+    
+    async def action_submit(self) -> None:
+        """Reset the history position, then submit as usual."""
+        self.command_history.reset_index()
+        await super().action_submit()
 
-from ssh_manager import SSHManager
-from ai_mentor import BanditAIMentor
-from level_info import BanditLevelInfo
-from command_history import CommandHistory
-from config import ConfigManager
-from cache import cache
-from session_manager import SessionManager
+from .level_info import BanditLevelInfo
+from .command_history import CommandHistory
+from .config import ConfigManager
+from .session_manager import SessionManager
 
-# Load environment variables
-load_dotenv()
+# Lines kept in the terminal view; older output is dropped from the top
+TERMINAL_SCROLLBACK_LINES = 2000
+# Raw SSH output chunks kept for the AI mentor's context
+TERMINAL_CONTEXT_CHUNKS = 64
+# Seconds to collect SSH output before writing it to the terminal view (about one frame)
+TERMINAL_FLUSH_DELAY = 0.033
+# Mentor reply in offline mode when no earlier reply to the question is cached
+OFFLINE_MENTOR_RESPONSE = ("AI mentor is not available in offline mode. Please connect to the internet "
+                           "and disable offline mode to use the AI mentor.")
 
 class BanditCLIApp(App):
     """A Textual app for the Bandit Wargame CLI."""
     
     CSS_PATH = "app.tcss"
     offline_mode = reactive(False)
+    ssh_connected = reactive(False)
+    loading = reactive(False)
     
     BINDINGS = [
         ("d", "toggle_dark", "Toggle dark mode"),
@@ -60,42 +76,88 @@ class BanditCLIApp(App):
         ("o", "toggle_offline_mode", "Toggle Offline Mode"),
     ]
     
+    # Button id -> name of the method that handles it
+    _BUTTON_DISPATCH: ClassVar[Dict[str, str]] = {
+        "ssh_connect": "connect_ssh",
+        "ssh_disconnect": "disconnect_ssh",
+        "send_button": "send_command",
+        "prev_level": "previous_level",
+        "next_level": "next_level",
+        "mentor_send": "send_mentor_message",
+    }
+    
     def __init__(self):
         super().__init__()
         self.session_manager = SessionManager()
         self.current_level = 0
         self.session_id = "default"
-        self.recent_commands = []
-        self.terminal_output = ""
-<<<<<<< HEAD
-        self.ssh_manager = SSHManager(notify_callback=self.notify)
-        self.level_info = BanditLevelInfo(notify_callback=self.notify)
-        self.ai_mentor = BanditAIMentor(notify_callback=self.notify)
-        self.ssh_connected = reactive(False)
-        self.loading = reactive(False)
+        self.config = ConfigManager()
+        # Last few commands, kept for the AI mentor's context
+        self.recent_commands = deque(maxlen=self.config.get("ui.max_recent_commands", 10))
+        self.terminal_output = deque(maxlen=TERMINAL_CONTEXT_CHUNKS)
+        # Raw SSH output waiting to be decoded and written to the terminal view
+        self._pending_output = []
+        self._flush_handle = None
+        # Keeps a partial UTF-8 sequence from one flush to the next
+        self._output_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # Widgets looked up by selector, filled in on first use
+        self._widgets = {}
+        # Loading indicators, collected once on mount
+        self._loading_indicators = ()
+        # Incremented per mentor message so a superseded reply stops writing to the chat
+        self._mentor_turn = 0
+        self.level_info = BanditLevelInfo(notify_callback=self._notify_callback)
+        self.command_history = CommandHistory(
+            max_size=self.config.get("history.max_commands", 100),
+            history_file=os.path.expanduser("~/.bandit_cli/command_history.json"),
+            lazy=True
+        )
+
+    @cached_property
+    def ssh_manager(self):
+        """SSH session manager, created on first use so paramiko loads after the UI is up."""
+        from .ssh_manager import SSHManager
+        return SSHManager(
+            notify_callback=self._notify_callback,
+            pool_size=self.config.get("ssh.pool_size", 4),
+            keepalive_interval=self.config.get("ssh.keepalive_interval", 30),
+            send_delay=self.config.get("ssh.send_delay", 0.001)
+        )
+
+    @cached_property
+    def ai_mentor(self):
+        """AI mentor, created on first use."""
+        from dotenv import load_dotenv
+        from .ai_mentor import BanditAIMentor
+        
+        # The mentor's model and provider keys come from the environment (.env)
+        load_dotenv()
+        return BanditAIMentor(notify_callback=self._notify_callback)
+
+    def _notify_callback(self, message: str, severity: str):
+        """Notify callback for helper objects, which pass the severity positionally."""
+        self.notify(message, severity=severity)
+
+    def _widget(self, selector: str, widget_type):
+        """Return the widget matching a selector, querying the DOM only the first time."""
+        widget = self._widgets.get(selector)
+        if widget is None:
+            widget = self._widgets[selector] = self.query_one(selector, widget_type)
+        return widget
 
     def watch_ssh_connected(self, connected: bool):
         """Called when the ssh_connected reactive property changes."""
-        self.query_one("#ssh_connect", Button).disabled = connected
-        self.query_one("#ssh_disconnect", Button).disabled = not connected
-        self.query_one("#command_input", Input).disabled = not connected
-        self.query_one("#send_button", Button).disabled = not connected
+        if not self.is_running:
+            return
+        self._widget("#ssh_connect", Button).disabled = connected
+        self._widget("#ssh_disconnect", Button).disabled = not connected
+        self._widget("#command_input", Input).disabled = not connected
+        self._widget("#send_button", Button).disabled = not connected
 
     def watch_loading(self, loading: bool):
         """Called when the loading reactive property changes."""
-        for indicator in self.query(LoadingIndicator):
+        for indicator in self._loading_indicators:
             indicator.display = loading
-=======
-        self.ssh_manager = SSHManager()
-        self.level_info = BanditLevelInfo()
-        self.ssh_connected = False
-        self.config = ConfigManager()
-        self.command_history = CommandHistory(
-            max_size=self.config.get("history.max_commands", 100),
-            history_file=os.path.expanduser("~/.bandit_cli/command_history.json")
-        )
-        self.offline_mode = False
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
     
     def compose(self):
         """Create child widgets for the app."""
@@ -115,7 +177,7 @@ class BanditCLIApp(App):
         """Compose the terminal view."""
         with Vertical(id="terminal-view"):
             yield LoadingIndicator()
-            yield TextArea(id="terminal_output", read_only=True)
+            yield Log(id="terminal_output", max_lines=TERMINAL_SCROLLBACK_LINES)
             with Horizontal(id="ssh-controls"):
                 with Vertical():
                     yield Label("Username:")
@@ -159,13 +221,18 @@ class BanditCLIApp(App):
         self.title = "Bandit Wargame CLI"
         self.sub_title = "A terminal interface for OverTheWire Bandit"
         
+        self._loading_indicators = tuple(self.query(LoadingIndicator))
+        
         # Initialize the level info
         self.update_level_info()
+        
+        # Read saved command history off the UI thread
+        self._load_command_history()
 
         # Initial state of buttons
-        self.query_one("#ssh_disconnect", Button).disabled = True
-        self.query_one("#command_input", Input).disabled = True
-        self.query_one("#send_button", Button).disabled = True
+        self._widget("#ssh_disconnect", Button).disabled = True
+        self._widget("#command_input", Input).disabled = True
+        self._widget("#send_button", Button).disabled = True
     
     def watch_offline_mode(self, offline_mode: bool):
         """Watch for changes to offline_mode and update the subtitle."""
@@ -177,23 +244,21 @@ class BanditCLIApp(App):
     def update_level_info(self):
         """Update the level information display."""
         level_info_text = self.level_info.format_level_info(self.current_level)
-        level_info_widget = self.query_one("#level_info", TextArea)
+        level_info_widget = self._widget("#level_info", TextArea)
         level_info_widget.load_text(level_info_text)
     
+    @work(thread=True, exclusive=True, group="history")
+    def _load_command_history(self):
+        """Read the command history file and merge it into the in-memory history."""
+        commands = self.command_history.read_history_file()
+        if commands:
+            self.call_from_thread(self.command_history.merge_commands, commands)
+    
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle button presses."""
-        if event.button.id == "ssh_connect":
-            self.connect_ssh()
-        elif event.button.id == "ssh_disconnect":
-            self.disconnect_ssh()
-        elif event.button.id == "send_button":
-            self.send_command()
-        elif event.button.id == "prev_level":
-            self.previous_level()
-        elif event.button.id == "next_level":
-            self.next_level()
-        elif event.button.id == "mentor_send":
-            self.send_mentor_message()
+        handler = self._BUTTON_DISPATCH.get(event.button.id)
+        if handler:
+            getattr(self, handler)()
     
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """Handle input submissions."""
@@ -204,19 +269,15 @@ class BanditCLIApp(App):
     
     def connect_ssh(self):
         """Connect to the SSH server."""
-<<<<<<< HEAD
-        self.loading = True
-=======
         # Check if we're in offline mode
         if self.offline_mode:
             self.notify("Cannot connect in offline mode", severity="error")
             return
         
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
-        username_input = self.query_one("#ssh_username", Input)
-        password_input = self.query_one("#ssh_password", Input)
-        port_input = self.query_one("#ssh_port", Input)
-        timeout_input = self.query_one("#ssh_timeout", Input)
+        username_input = self._widget("#ssh_username", Input)
+        password_input = self._widget("#ssh_password", Input)
+        port_input = self._widget("#ssh_port", Input)
+        timeout_input = self._widget("#ssh_timeout", Input)
         
         username = username_input.value
         password = password_input.value
@@ -225,23 +286,26 @@ class BanditCLIApp(App):
         
         if not username or not password:
             self.notify("Please enter both username and password", severity="error")
-            self.loading = False
             return
         
-        # Convert port and timeout to integer
-        try:
-            port_int = int(port)
-            timeout_int = int(timeout_str)
-        except ValueError:
-            self.notify("Port and timeout must be valid numbers", severity="error")
-            self.loading = False
+        # Validate port and timeout without raising on the common, valid path
+        port = port.strip()
+        if not (port.isascii() and port.isdigit()):
+            self.notify("Port must be a valid number", severity="error")
             return
-            
-        # Validate port range
-        if port_int < 1 or port_int > 65535:
+        port_int = int(port)
+        if not 1 <= port_int <= 65535:
             self.notify("Port must be between 1 and 65535", severity="error")
             return
         
+        timeout_str = timeout_str.strip()
+        if not (timeout_str.isascii() and timeout_str.isdigit()):
+            self.notify("Timeout must be a valid number", severity="error")
+            return
+        timeout_int = int(timeout_str)
+        
+        self.loading = True
+        
         # Create or update session
         session_name = f"{username}@bandit.labs.overthewire.org:{port_int}"
         self.session_manager.create_session(
@@ -254,48 +318,77 @@ class BanditCLIApp(App):
         )
         self.session_manager.set_current_session(self.session_id)
         
-        # Attempt to connect with retries
-        success = self.ssh_manager.create_connection(
-            self.session_id,
+        # Connect off the UI thread; retries can take several seconds
+        self._widget("#ssh_connect", Button).disabled = True
+        self._open_ssh_connection(
             "bandit.labs.overthewire.org",
             port_int,
             username,
             password,
-<<<<<<< HEAD
-            timeout=timeout_int
-=======
+            timeout_int
+        )
+    
+    @work(thread=True, exclusive=True, group="ssh")
+    def _open_ssh_connection(self, hostname: str, port: int, username: str, password: str, timeout: int):
+        """Open the SSH connection, with retries, from a worker thread."""
+        success = self.ssh_manager.create_connection(
+            self.session_id,
+            hostname,
+            port,
+            username,
+            password,
+            timeout=timeout,
             retries=3
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
         )
-        
+        self.call_from_thread(self._finish_ssh_connect, success)
+    
+    def _finish_ssh_connect(self, success: bool):
+        """Update the UI once a connection attempt has finished."""
         if success:
             self.ssh_connected = True
             self.notify("SSH connection established", severity="success")
+            # Drop any partial character left over from the previous session
+            self._output_decoder.reset()
             # Set up the output callback
             connection = self.ssh_manager.get_connection(self.session_id)
             if connection:
-                connection.set_output_callback(self.on_ssh_output)
+                # Output arrives on the reader thread; hand it to the UI thread
+                connection.set_output_callback(
+                    lambda data: self.call_from_thread(self.on_ssh_output, data)
+                )
         else:
-<<<<<<< HEAD
-            self.notify("Failed to establish SSH connection", severity="error")
-        self.loading = False
-=======
             self.notify("Failed to establish SSH connection. Please check your credentials, network connection, and ensure the Bandit server is accessible.", severity="error")
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
+            self._widget("#ssh_connect", Button).disabled = False
+        self.loading = False
     
     def disconnect_ssh(self):
         """Disconnect from the SSH server."""
-        self.ssh_manager.disconnect_session(self.session_id)
+        # Keep the login pooled so reconnecting skips the handshake
+        self.ssh_manager.release_session(self.session_id)
         self.ssh_connected = False
         self.notify("SSH connection closed", severity="information")
     
-    def on_ssh_output(self, data: str):
+    def on_ssh_output(self, data: bytes):
         """Handle SSH output."""
-        self.terminal_output += data
-        terminal_output = self.query_one("#terminal_output", TextArea)
-        terminal_output.load_text(self.terminal_output)
-        # Scroll to the end
-        terminal_output.scroll_end(animate=False)
+        # Coalesce bursts of output into one write per frame
+        self._pending_output.append(data)
+        if self._flush_handle is None:
+            self._flush_handle = self.set_timer(TERMINAL_FLUSH_DELAY, self._flush_terminal)
+    
+    def _flush_terminal(self):
+        """Write pending SSH output to the terminal view."""
+        self._flush_handle = None
+        if not self._pending_output:
+            return
+        # Decode the whole batch at once
+        data = self._output_decoder.decode(b"".join(self._pending_output))
+        self._pending_output.clear()
+        if not data:
+            return
+        self.terminal_output.append(data)
+        
+        # Log appends, trims to max_lines and scrolls to the end itself
+        self._widget("#terminal_output", Log).write(data)
     
     def send_command(self):
         """Send a command to the SSH server."""
@@ -308,7 +401,7 @@ class BanditCLIApp(App):
             self.notify("Not connected to SSH server", severity="error")
             return
         
-        command_input = self.query_one("#command_input", Input)
+        command_input = self._widget("#command_input", Input)
         command = command_input.value
         
         if not command:
@@ -323,10 +416,8 @@ class BanditCLIApp(App):
         self.command_history.add_command(command)
         self.command_history.reset_index()
         
-        # Add command to recent commands (for AI context)
+        # Add command to recent commands (for AI context); the deque drops the oldest
         self.recent_commands.append(command)
-        if len(self.recent_commands) > 10:
-            self.recent_commands.pop(0)
         
         # Send command to SSH server
         connection = self.ssh_manager.get_connection(self.session_id)
@@ -338,19 +429,10 @@ class BanditCLIApp(App):
         
         # Clear the input
         command_input.value = ""
-        
-        # Clear the input
-        command_input.value = ""
     
     def send_mentor_message(self):
         """Send a message to the AI mentor."""
-        # Check if we're in offline mode
-        if self.offline_mode:
-            # In offline mode, provide a cached response or default message
-            self._send_offline_mentor_message()
-            return
-        
-        mentor_input = self.query_one("#mentor_input", Input)
+        mentor_input = self._widget("#mentor_input", Input)
         message = mentor_input.value
         
         if not message:
@@ -361,69 +443,73 @@ class BanditCLIApp(App):
             self.notify("Message is too long (maximum 1000 characters)", severity="error")
             return
         
-<<<<<<< HEAD
+        # Clear the input
+        mentor_input.value = ""
+        
+        if self.offline_mode:
+            # Reuse an earlier reply to the same question if there is one; a mentor
+            # that was never created has no replies, so don't create it just to look
+            response = None
+            if "ai_mentor" in self.__dict__:
+                response = self.ai_mentor.get_cached_response(
+                    message, self.current_level, tuple(self.recent_commands)
+                )
+            if response is None:
+                response = OFFLINE_MENTOR_RESPONSE
+            self._append_mentor_chat(f"\nYou: {message}\nMentor: {response}")
+            return
+        
         self.loading = True
-
-        mentor_chat = self.query_one("#mentor_chat", TextArea)
-        current_text = mentor_chat.text or ""
-        mentor_chat.load_text(f"{current_text}\nYou: {message}\nMentor: ")
-
-        # Get AI response
-        response_stream = self.ai_mentor.get_response(
+        
+        self._mentor_turn += 1
+        self._append_mentor_chat(f"\nYou: {message}\nMentor: ")
+        
+        # Get AI response off the UI thread; snapshot the context it needs
+        self._stream_mentor_response(
+            self._mentor_turn,
             message,
-            self.session_id,
-            self.current_level,
-            self.recent_commands,
-            self.terminal_output
+            tuple(self.recent_commands),
+            "".join(self.terminal_output)
         )
-=======
+    
+    @work(thread=True, exclusive=True, group="mentor")
+    def _stream_mentor_response(self, turn: int, message: str, recent_commands, terminal_output: str):
+        """Stream the AI mentor's reply into the chat from a worker thread."""
+        worker = get_current_worker()
         try:
-            # Get AI response
-            response = ai_mentor.get_response(
+            response_stream = self.ai_mentor.get_response(
                 message,
                 self.session_id,
                 self.current_level,
-                self.recent_commands,
-                self.terminal_output
+                recent_commands,
+                terminal_output
             )
             
             # Update chat display
-            mentor_chat = self.query_one("#mentor_chat", TextArea)
-            current_text = mentor_chat.text if mentor_chat.text else ""
-            new_text = f"{current_text}\nYou: {message}\nMentor: {response}"
-            mentor_chat.load_text(new_text)
-            mentor_chat.scroll_end(animate=False)
+            for chunk in response_stream:
+                if worker.is_cancelled:
+                    break
+                self.call_from_thread(self._append_mentor_reply, turn, chunk)
         except Exception as e:
             self.notify(f"Failed to get AI response: {str(e)}", severity="error")
-        
-        # Clear the input
-        mentor_input.value = ""
+        finally:
+            self.call_from_thread(self._finish_mentor_reply, turn)
     
-    def _send_offline_mentor_message(self):
-        """Send a message to the AI mentor in offline mode."""
-        mentor_input = self.query_one("#mentor_input", Input)
-        message = mentor_input.value
-        
-        if not message:
-            return
-            
-        # Validate message length
-        if len(message) > 1000:
-            self.notify("Message is too long (maximum 1000 characters)", severity="error")
-            return
-        
-        # Provide a default offline response
-        response = "AI mentor is not available in offline mode. Please connect to the internet and disable offline mode to use the AI mentor."
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
-        
-        # Update chat display
-        for chunk in response_stream:
-            mentor_chat.load_text(mentor_chat.text + chunk)
-            mentor_chat.scroll_end(animate=False)
-        
-        # Clear the input
-        mentor_input.value = ""
-        self.loading = False
+    def _append_mentor_reply(self, turn: int, chunk: str):
+        """Append a reply chunk unless a newer message has been sent since."""
+        if turn == self._mentor_turn:
+            self._append_mentor_chat(chunk)
+    
+    def _finish_mentor_reply(self, turn: int):
+        """Clear the loading state once the latest reply is complete."""
+        if turn == self._mentor_turn:
+            self.loading = False
+    
+    def _append_mentor_chat(self, text: str):
+        """Append text to the end of the mentor chat without reloading it."""
+        mentor_chat = self._widget("#mentor_chat", TextArea)
+        mentor_chat.insert(text, mentor_chat.document.end, maintain_selection_offset=False)
+        mentor_chat.scroll_end(animate=False)
     
     def previous_level(self):
         """Go to the previous level."""
@@ -441,8 +527,7 @@ class BanditCLIApp(App):
     def next_level(self):
         """Go to the next level."""
         # Check if we're trying to go beyond the available levels
-        max_level = max([int(level) for level in self.level_info.get_all_levels().keys()], default=0)
-        if self.current_level < max_level:
+        if self.current_level < self.level_info.max_level:
             self.current_level += 1
             self.update_level_info()
             # Update session
@@ -453,6 +538,10 @@ class BanditCLIApp(App):
         else:
             self.notify(f"Level {self.current_level} is the highest available level", severity="warning")
     
+    def action_switch_tab(self, tab_id: str):
+        """Show the tab with the given id."""
+        self._widget("TabbedContent", TabbedContent).active = tab_id
+    
     def action_toggle_dark(self):
         """Toggle dark mode."""
         self.dark = not self.dark
@@ -470,9 +559,23 @@ class BanditCLIApp(App):
 
     def on_resize(self, event):
         """Handle terminal resize events."""
+        # Nothing to resize until the SSH manager has been created
+        if "ssh_manager" not in self.__dict__:
+            return
         if connection := self.ssh_manager.get_connection(self.session_id):
             connection.resize_pty(width=event.size.width, height=event.size.height - 10)
 
-if __name__ == "__main__":
+    def on_unmount(self):
+        """Save pending session changes and close SSH connections on exit."""
+        self.session_manager.flush()
+        if "ssh_manager" in self.__dict__:
+            self.ssh_manager.disconnect_all()
+
+def main():
+    """Run the Bandit CLI application."""
     app = BanditCLIApp()
-    app.run()
\ No newline at end of file
+    app.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,24 @@
 """Session management for the Bandit CLI application."""
-import json
+import atexit
+import logging
 import os
-from typing import Dict, List, Optional
+import sys
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 
+from . import json_utils
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# Dataclasses can generate __slots__ from Python 3.10 on
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class SessionInfo:
     """Information about a session."""
     id: str
@@ -18,29 +29,74 @@ class SessionInfo:
     port: int
     username: str
     level: int = 0
+    # Serialised form, rebuilt only after a field changes
+    _dict_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name != "_dict_cache":
+            object.__setattr__(self, "_dict_cache", None)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the session as a plain dict for saving; callers must not modify it."""
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "id": self.id,
+                "name": self.name,
+                "created_at": self.created_at,
+                "last_used": self.last_used,
+                "hostname": self.hostname,
+                "port": self.port,
+                "username": self.username,
+                "level": self.level,
+            }
+        return self._dict_cache
+
+
+# Fields that update_session may change; excludes the internal cache
+_SESSION_FIELDS = frozenset(f.name for f in fields(SessionInfo) if f.init)
+
+# Managers whose pending changes are written at exit; weak so they can still be freed
+_live_managers: "weakref.WeakSet[SessionManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_managers():
+    """Make sure pending session changes reach disk on shutdown."""
+    for manager in list(_live_managers):
+        manager.flush()
 
 
 class SessionManager:
     """Manages application sessions."""
     
-    def __init__(self, sessions_file: str = None):
+    def __init__(self, sessions_file: str = None, save_delay: float = 2.0):
         """
         Initialize session manager.
         
         Args:
             sessions_file: Path to file for persistent session storage.
+            save_delay: Seconds to wait after the last change before writing to disk
         """
         if sessions_file is None:
-            # Default sessions file location
-            sessions_dir = Path.home() / ".bandit_cli"
-            sessions_dir.mkdir(exist_ok=True)
-            self.sessions_file = sessions_dir / "sessions.json"
+            # Default sessions file location; the directory is created on first save
+            self.sessions_file = Path.home() / ".bandit_cli" / "sessions.json"
         else:
             self.sessions_file = Path(sessions_file)
             
         # Load sessions
         self.sessions: Dict[str, SessionInfo] = self._load_sessions()
         self.current_session_id: Optional[str] = None
+        # get_all_sessions() result, dropped whenever a session is added or removed
+        self._all_cache: Optional[List[SessionInfo]] = None
+        
+        # Pending-write state for debounced saves
+        self.save_delay = save_delay
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        # Guards sessions and the pending-write state; the delayed save runs on a timer thread
+        self._lock = threading.Lock()
+        _live_managers.add(self)
     
     def _load_sessions(self) -> Dict[str, SessionInfo]:
         """Load sessions from file."""
@@ -48,8 +104,7 @@ class SessionManager:
             return {}
         
         try:
-            with open(self.sessions_file, 'r') as f:
-                sessions_data = json.load(f)
+            sessions_data = json_utils.loads(self.sessions_file.read_bytes())
             
             sessions = {}
             for session_id, session_info in sessions_data.items():
@@ -57,25 +112,49 @@ class SessionManager:
             
             return sessions
         except Exception as e:
-            print(f"Warning: Could not load sessions file: {e}")
+            logger.warning("Could not load sessions file: %s", e)
             return {}
     
+    def _schedule_save(self):
+        """Mark sessions as changed and (re)arm the delayed save."""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write pending changes to file immediately."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._dirty = False
+                self._save_sessions()
+    
     def _save_sessions(self):
         """Save sessions to file."""
+        tmp_file = self.sessions_file.with_name(self.sessions_file.name + ".tmp")
         try:
-            # Convert SessionInfo objects to dictionaries
+            # Convert SessionInfo objects to dictionaries; the caller holds the lock
             sessions_data = {
-                session_id: asdict(session_info) 
+                session_id: session_info.to_dict()
                 for session_id, session_info in self.sessions.items()
             }
             
             # Create directory if it doesn't exist
             self.sessions_file.parent.mkdir(exist_ok=True)
             
-            with open(self.sessions_file, 'w') as f:
-                json.dump(sessions_data, f, indent=2)
+            # Encode in one go and swap the file in so a crash never leaves a torn file
+            tmp_file.write_bytes(json_utils.dumps(sessions_data, indent=True))
+            os.replace(tmp_file, self.sessions_file)
         except Exception as e:
-            print(f"Warning: Could not save sessions file: {e}")
+            logger.warning("Could not save sessions file: %s", e)
+            # Don't leave a half-written temporary file behind
+            tmp_file.unlink(missing_ok=True)
     
     def create_session(self, session_id: str, name: str, hostname: str, port: int, 
                       username: str, level: int = 0) -> SessionInfo:
@@ -105,8 +184,10 @@ class SessionManager:
             level=level
         )
         
-        self.sessions[session_id] = session_info
-        self._save_sessions()
+        with self._lock:
+            self.sessions[session_id] = session_info
+            self._all_cache = None
+        self._schedule_save()
         return session_info
     
     def get_session(self, session_id: str) -> Optional[SessionInfo]:
@@ -126,9 +207,11 @@ class SessionManager:
         Get all sessions.
         
         Returns:
-            List of all SessionInfo objects
+            List of all SessionInfo objects, shared between calls; callers must not modify it
         """
-        return list(self.sessions.values())
+        if self._all_cache is None:
+            self._all_cache = list(self.sessions.values())
+        return self._all_cache
     
     def update_session(self, session_id: str, **kwargs):
         """
@@ -138,20 +221,20 @@ class SessionManager:
             session_id: Session identifier
             **kwargs: Fields to update
         """
-        if session_id not in self.sessions:
-            return
-        
-        session_info = self.sessions[session_id]
-        
-        # Update fields
-        for key, value in kwargs.items():
-            if hasattr(session_info, key):
-                setattr(session_info, key, value)
-        
-        # Update last_used timestamp
-        session_info.last_used = datetime.now().isoformat()
+        with self._lock:
+            session_info = self.sessions.get(session_id)
+            if session_info is None:
+                return
+            
+            # Update fields
+            for key, value in kwargs.items():
+                if key in _SESSION_FIELDS:
+                    setattr(session_info, key, value)
+            
+            # Update last_used timestamp
+            session_info.last_used = datetime.now().isoformat()
         
-        self._save_sessions()
+        self._schedule_save()
     
     def delete_session(self, session_id: str):
         """
@@ -160,9 +243,11 @@ class SessionManager:
         Args:
             session_id: Session identifier
         """
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            self._save_sessions()
+        with self._lock:
+            if self.sessions.pop(session_id, None) is None:
+                return
+            self._all_cache = None
+        self._schedule_save()
     
     def set_current_session(self, session_id: str):
         """
@@ -171,10 +256,13 @@ class SessionManager:
         Args:
             session_id: Session identifier
         """
-        if session_id in self.sessions:
+        with self._lock:
+            session_info = self.sessions.get(session_id)
+            if session_info is None:
+                return
             self.current_session_id = session_id
-            # Update last_used timestamp
-            self.update_session(session_id, last_used=datetime.now().isoformat())
+            session_info.last_used = datetime.now().isoformat()
+        self._schedule_save()
     
     def get_current_session(self) -> Optional[SessionInfo]:
         """
@@ -1,10 +1,24 @@
+import functools
+import logging
 import paramiko
+import selectors
+import socket
 import threading
 import time
-import socket
-from typing import Optional, Callable
+from collections import OrderedDict
+from itertools import chain
+from typing import Optional, Callable, Tuple
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
+# Bytes read from a channel at a time
+READ_CHUNK_SIZE = 65536
+# Buffered command bytes that trigger an immediate send
+SEND_BUFFER_SIZE = 4096
+# Seconds to wait between connection attempts
+RETRY_DELAY = 1
+
 class SSHConnectionError(Enum):
     """Enumeration of SSH connection error types."""
     AUTHENTICATION_FAILED = "Authentication failed"
@@ -20,131 +34,247 @@ class SSHConnectionException(Exception):
         self.message = message or error_type.value
         super().__init__(self.message)
 
+class ChannelSelector:
+    """Reads every open shell channel from a single background thread."""
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Writing to this socket wakes the loop so it sees newly (un)registered channels
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ, None)
+
+    def register(self, connection: "SSHConnection"):
+        """Start delivering a connection's channel output to its callback."""
+        with self._lock:
+            self._selector.register(connection.channel, selectors.EVENT_READ, connection)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake()
+
+    def unregister(self, connection: "SSHConnection"):
+        """Stop watching a connection's channel; call before closing it."""
+        with self._lock:
+            try:
+                self._selector.unregister(connection.channel)
+            except (KeyError, ValueError):
+                return
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self):
+        """Wait for any channel to become readable and hand its data over."""
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    try:
+                        self._wake_reader.recv(4096)
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                try:
+                    key.data._read_available()
+                except Exception:
+                    # A failing output callback must not stop reading for every other channel
+                    logger.exception("Stopped reading SSH output after a callback error")
+                    key.data._stop_reading()
+
+
+@functools.lru_cache(maxsize=1)
+def get_channel_selector() -> ChannelSelector:
+    """Return the shared channel selector, creating it on first use."""
+    return ChannelSelector()
+
+
 class SSHConnection:
-    def __init__(self, hostname: str, port: int, username: str, password: str, notify_callback: Callable[[str, str], None], timeout: int = 10):
+    def __init__(self, hostname: str, port: int, username: str, password: str,
+                 notify_callback: Optional[Callable[[str, str], None]] = None, timeout: int = 10,
+                 keepalive_interval: int = 30, client: Optional[paramiko.SSHClient] = None,
+                 send_delay: float = 0.0):
         self.hostname = hostname
         self.port = port
         self.username = username
         self.password = password
-        self.client: Optional[paramiko.SSHClient] = None
+        # An already authenticated client may be passed in to share its transport
+        self.client: Optional[paramiko.SSHClient] = client
         self.channel: Optional[paramiko.Channel] = None
         self.connected = False
-        self.output_callback: Optional[Callable[[str], None]] = None
-        self.read_thread: Optional[threading.Thread] = None
+        self.output_callback: Optional[Callable[[bytes], None]] = None
         self.stop_reading = False
         self.notify = notify_callback
         self.timeout = timeout
+        self.keepalive_interval = keepalive_interval
+        # With a send delay, commands sent close together go out in one write
+        self.send_delay = send_delay
+        self._send_buf = bytearray()
+        self._send_lock = threading.Lock()
+        self._send_timer: Optional[threading.Timer] = None
         
-<<<<<<< HEAD
-    def connect(self) -> bool:
-        """Establish SSH connection"""
-        try:
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            self.client.connect(
-                hostname=self.hostname,
-                port=self.port,
-                username=self.username,
-                password=self.password,
-                timeout=self.timeout
-            )
-            
-            # Create interactive shell
-            self.channel = self.client.invoke_shell(term='xterm-color', width=80, height=24)
-            self.channel.settimeout(0.1)
-            self.connected = True
-            
-            # Start reading output in background
-            self.start_reading()
-            
-            return True
-            
-        except (paramiko.AuthenticationException, paramiko.SSHException, TimeoutError) as e:
-            self.notify(f"SSH connection failed: {e}", "error")
-            return False
-=======
-    def _create_ssh_client(self) -> None:
-        """Create and configure SSH client with connection parameters."""
-        self.client = paramiko.SSHClient()
-        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        self.client.connect(
+    def _report(self, message: str, severity: str = "error"):
+        """Send a message to the notify callback, or log it when there is none."""
+        if self.notify:
+            self.notify(message, severity)
+        else:
+            logger.log(logging.ERROR if severity == "error" else logging.WARNING, "%s", message)
+
+    def _new_ssh_client(self) -> paramiko.SSHClient:
+        """Create an SSH client that accepts unknown host keys."""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        return client
+
+    def _create_ssh_client(self, client: paramiko.SSHClient) -> None:
+        """Log in with the given client and keep it once connected."""
+        client.connect(
             hostname=self.hostname,
             port=self.port,
             username=self.username,
             password=self.password,
-            timeout=10
+            timeout=self.timeout
         )
+        # Keep idle connections alive through NAT while they sit in the pool
+        transport = client.get_transport()
+        if transport and self.keepalive_interval:
+            transport.set_keepalive(self.keepalive_interval)
+        self.client = client
 
     def _create_shell_channel(self) -> None:
         """Create and configure an interactive shell channel."""
-        self.channel = self.client.invoke_shell()
-        self.channel.settimeout(0.1)
+        self.channel = self.client.invoke_shell(term='xterm-color', width=80, height=24)
         self.connected = True
         self.start_reading()
 
+    def _discard_client(self, client: Optional[paramiko.SSHClient]):
+        """Close a client this connection created once it gives up on it."""
+        if client is None:
+            return
+        client.close()
+        if self.client is client:
+            self.client = None
+
     def connect(self, retries: int = 3) -> bool:
         """Establish SSH connection with retry mechanism"""
+        # Retries log in again with the same client object rather than building a new one
+        client = None
         for attempt in range(retries):
             try:
-                self._create_ssh_client()
+                # A shared client only needs a new shell channel, not a new login
+                if not self.is_reusable():
+                    if client is None:
+                        client = self._new_ssh_client()
+                    self._create_ssh_client(client)
                 self._create_shell_channel()
                 return True
                 
             except paramiko.AuthenticationException:
-                print(f"SSH connection failed: Authentication failed for user {self.username}")
+                self._report(f"SSH connection failed: Authentication failed for user {self.username}")
+                self._discard_client(client)
                 return False  # Don't retry on authentication failures
             except paramiko.SSHException as e:
                 if "timed out" in str(e).lower():
-                    print(f"SSH connection failed: Connection timeout when connecting to {self.hostname}:{self.port}")
+                    self._report(f"SSH connection failed: Connection timeout when connecting to {self.hostname}:{self.port}")
                 else:
-                    print(f"SSH connection failed: SSH error - {e}")
-                if attempt < retries - 1:
-                    print(f"Retrying connection... ({attempt + 1}/{retries - 1})")
-                    time.sleep(1)
+                    self._report(f"SSH connection failed: SSH error - {e}")
             except TimeoutError:
-                print(f"SSH connection failed: Connection timeout when connecting to {self.hostname}:{self.port}")
-                if attempt < retries - 1:
-                    print(f"Retrying connection... ({attempt + 1}/{retries - 1})")
-                    time.sleep(1)
+                self._report(f"SSH connection failed: Connection timeout when connecting to {self.hostname}:{self.port}")
             except Exception as e:
-                print(f"SSH connection failed: {e}")
-                if attempt < retries - 1:
-                    print(f"Retrying connection... ({attempt + 1}/{retries - 1})")
-                    time.sleep(1)
+                self._report(f"SSH connection failed: {e}")
+            
+            if attempt < retries - 1:
+                if client is not None and client is not self.client:
+                    # Drop the half-open transport from a failed login; the client can connect again
+                    client.close()
+                self._report(f"Retrying connection... ({attempt + 1}/{retries - 1})", "warning")
+                time.sleep(RETRY_DELAY)
         
+        # A client passed in is shared with other sessions and stays open
+        self._discard_client(client)
         return False
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
     
     def start_reading(self):
-        """Start background thread to read SSH output"""
+        """Have the shared selector thread read this connection's SSH output"""
         self.stop_reading = False
-        self.read_thread = threading.Thread(target=self._read_output)
-        self.read_thread.daemon = True
-        self.read_thread.start()
-    
-    def _read_output(self):
-        """Background thread function to continuously read SSH output"""
-        while not self.stop_reading and self.connected:
-            try:
-                if self.channel:
-                    data = self.channel.recv(1024).decode('utf-8', errors='ignore')
-                    if data and self.output_callback:
-                        self.output_callback(data)
-            except (socket.timeout, Exception) as e:
-                if not self.stop_reading:
-                    self.notify(f"Error reading SSH output: {e}", "error")
-                break
+        get_channel_selector().register(self)
+
+    def _stop_reading(self):
+        """Take the channel off the selector before it is closed"""
+        self.stop_reading = True
+        if self.channel is not None:
+            get_channel_selector().unregister(self)
+
+    def _read_available(self):
+        """Read what the channel has ready; called on the selector thread"""
+        if self.stop_reading or not self.connected:
+            return
+        try:
+            # Raw bytes; the receiver decodes them, so multi-byte characters
+            # split across reads are not lost
+            data = self.channel.recv(READ_CHUNK_SIZE)
+        except Exception as e:
+            if not self.stop_reading:
+                self._report(f"Error reading SSH output: {e}")
+            self._stop_reading()
+            return
+        if not data:
+            # End of stream: the server closed the shell
+            self.connected = False
+            self._stop_reading()
+            self._report("SSH session closed by the server", "warning")
+            return
+        if self.output_callback:
+            self.output_callback(data)
     
     def send_command(self, command: str):
         """Send command to SSH session"""
-        if self.channel and self.connected:
+        if not (self.channel and self.connected):
+            return
+        if not self.send_delay:
             try:
                 self.channel.send(command)
             except Exception as e:
-                self.notify(f"Error sending command: {e}", "error")
+                self._report(f"Error sending command: {e}")
+            return
+        
+        with self._send_lock:
+            self._send_buf += command.encode("utf-8")
+            if len(self._send_buf) > SEND_BUFFER_SIZE:
+                self._flush_send()
+            elif self._send_timer is None:
+                self._send_timer = threading.Timer(self.send_delay, self.flush)
+                self._send_timer.daemon = True
+                self._send_timer.start()
     
-    def set_output_callback(self, callback: Callable[[str], None]):
+    def flush(self):
+        """Send any buffered commands now"""
+        with self._send_lock:
+            self._flush_send()
+    
+    def _flush_send(self):
+        """Write the send buffer to the channel in one call; the caller holds the lock"""
+        if self._send_timer is not None:
+            self._send_timer.cancel()
+            self._send_timer = None
+        if not self._send_buf:
+            return
+        data = bytes(self._send_buf)
+        self._send_buf.clear()
+        if self.channel is None:
+            return
+        try:
+            # A batch can exceed what one send() accepts
+            self.channel.sendall(data)
+        except Exception as e:
+            self._report(f"Error sending command: {e}")
+    
+    def set_output_callback(self, callback: Callable[[bytes], None]):
         """Set callback function for SSH output"""
         self.output_callback = callback
     
@@ -154,17 +284,38 @@ class SSHConnection:
             try:
                 self.channel.resize_pty(width=width, height=height)
             except paramiko.SSHException as e:
-                self.notify(f"Error resizing PTY: {e}", "error")
+                self._report(f"Error resizing PTY: {e}")
+
+    def is_reusable(self) -> bool:
+        """Whether the underlying SSH transport is still up and can open a new shell"""
+        transport = self.client.get_transport() if self.client else None
+        return bool(transport and transport.is_active())
+
+    def release(self):
+        """Close the shell channel but keep the authenticated transport open"""
+        self.flush()
+        self._stop_reading()
+        self.connected = False
+        self.output_callback = None
+
+        if self.channel:
+            self.channel.close()
+            self.channel = None
+
+    def reopen(self) -> bool:
+        """Open a fresh shell on a released connection without reconnecting"""
+        try:
+            self._create_shell_channel()
+            return True
+        except Exception as e:
+            self._report(f"Could not reuse SSH connection: {e}", "warning")
+            return False
 
     def disconnect(self):
         """Close SSH connection"""
-        self.stop_reading = True
+        self.flush()
+        self._stop_reading()
         self.connected = False
-        
-        if self.read_thread:
-            self.read_thread.join(timeout=2)
-            if self.read_thread.is_alive():
-                self.notify("Warning: SSH reading thread did not exit gracefully.", "warning")
 
         if self.channel:
             self.channel.close()
@@ -173,42 +324,132 @@ class SSHConnection:
             self.client.close()
 
 class SSHManager:
-    def __init__(self, notify_callback: Callable[[str, str], None]):
+    def __init__(self, notify_callback: Optional[Callable[[str, str], None]] = None,
+                 pool_size: int = 4, keepalive_interval: int = 30, send_delay: float = 0.0):
         self.connections = {}
         self.notify = notify_callback
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval
+        self.send_delay = send_delay
+        # Released connections keyed by (hostname, port, username), least recently used first
+        self._pool: "OrderedDict[Tuple[str, int, str], SSHConnection]" = OrderedDict()
+        # Guards connections, _pool and _closed; connects run on worker threads.
+        # Never held while connecting or closing, which can block on the network
+        self._lock = threading.Lock()
+        # Set by disconnect_all so a connect finishing afterwards is closed, not stored
+        self._closed = False
     
     def create_connection(self, session_id: str, hostname: str, port: int, 
-<<<<<<< HEAD
-                         username: str, password: str, timeout: int = 10) -> bool:
-=======
-                         username: str, password: str, retries: int = 3) -> bool:
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
-        """Create new SSH connection"""
-        if session_id in self.connections:
-            self.disconnect_session(session_id)
+                         username: str, password: str, timeout: int = 10, retries: int = 3) -> bool:
+        """Create new SSH connection, reusing a pooled one for the same login if possible"""
+        self.disconnect_session(session_id)
+        
+        with self._lock:
+            pooled = self._pool.pop((hostname, port, username), None)
+        if pooled is not None:
+            if pooled.password == password and pooled.is_reusable() and pooled.reopen():
+                return self._store(session_id, pooled)
+            self._close(pooled)
         
-<<<<<<< HEAD
-        connection = SSHConnection(hostname, port, username, password, self.notify, timeout)
-        if connection.connect():
-=======
-        connection = SSHConnection(hostname, port, username, password)
+        # Open the new session as another channel on a live transport for the same login
+        connection = SSHConnection(hostname, port, username, password,
+                                   notify_callback=self.notify, timeout=timeout,
+                                   keepalive_interval=self.keepalive_interval,
+                                   send_delay=self.send_delay,
+                                   client=self.shared_transport_for(hostname, port, username, password))
         if connection.connect(retries=retries):
->>>>>>> a35b915fdb63a5b562c0be2ef5e5556614b1801c
-            self.connections[session_id] = connection
-            return True
+            return self._store(session_id, connection)
         return False
     
+    def _store(self, session_id: str, connection: SSHConnection) -> bool:
+        """Make a connected session current, or close it if the manager has shut down"""
+        with self._lock:
+            stored = not self._closed
+            if stored:
+                replaced = self.connections.pop(session_id, None)
+                self.connections[session_id] = connection
+        if not stored:
+            self._close(connection)
+            return False
+        if replaced is not None:
+            self._close(replaced)
+        return True
+    
+    def shared_transport_for(self, hostname: str, port: int, username: str,
+                             password: str) -> Optional[paramiko.SSHClient]:
+        """Get a live client already logged in with these credentials, if any"""
+        with self._lock:
+            candidates = list(chain(self.connections.values(), self._pool.values()))
+        for connection in candidates:
+            if ((connection.hostname, connection.port, connection.username, connection.password)
+                    == (hostname, port, username, password) and connection.is_reusable()):
+                return connection.client
+        return None
+    
+    def _close(self, connection: SSHConnection):
+        """Disconnect, or only close the shell while another session still shares the client"""
+        with self._lock:
+            shared = connection.client is not None and any(
+                other is not connection and other.client is connection.client
+                for other in chain(self.connections.values(), self._pool.values()))
+        if shared:
+            connection.release()
+        else:
+            connection.disconnect()
+    
     def get_connection(self, session_id: str) -> Optional[SSHConnection]:
         """Get SSH connection by session ID"""
         return self.connections.get(session_id)
     
     def disconnect_session(self, session_id: str):
         """Disconnect SSH session"""
-        if session_id in self.connections:
-            self.connections[session_id].disconnect()
-            del self.connections[session_id]
+        with self._lock:
+            connection = self.connections.pop(session_id, None)
+        if connection is not None:
+            self._close(connection)
+    
+    def release_session(self, session_id: str):
+        """Close a session's shell and keep its connection pooled for a quick reconnect"""
+        with self._lock:
+            connection = self.connections.pop(session_id, None)
+        if connection is None:
+            return
+        if self.pool_size <= 0 or not connection.is_reusable():
+            self._close(connection)
+            return
+        
+        connection.release()
+        key = (connection.hostname, connection.port, connection.username)
+        stale = []
+        with self._lock:
+            if self._closed:
+                stale.append(connection)
+            else:
+                previous = self._pool.pop(key, None)
+                self._pool[key] = connection
+                if previous is not None:
+                    stale.append(previous)
+                while len(self._pool) > self.pool_size:
+                    stale.append(self._pool.popitem(last=False)[1])
+        # Close replaced and evicted entries only after the pool holds the new one,
+        # so a client they share with it stays open
+        for stale_connection in stale:
+            self._close(stale_connection)
     
     def disconnect_all(self):
-        """Disconnect all SSH sessions"""
-        for session_id in list(self.connections.keys()):
-            self.disconnect_session(session_id)
\ No newline at end of file
+        """Disconnect all SSH sessions and close pooled connections"""
+        with self._lock:
+            self._closed = True
+        for connections in (self.connections, self._pool):
+            while True:
+                # Take one connection at a time under the lock and close it after
+                # releasing it; no inserts can arrive once _closed is set
+                with self._lock:
+                    if not connections:
+                        break
+                    _, connection = connections.popitem()
+                try:
+                    self._close(connection)
+                except Exception as e:
+                    # Keep closing the rest
+                    logger.warning("Could not close SSH connection: %s", e)
\ No newline at end of file
@@ -1,7 +1,103 @@
-"""Shared test configurations and fixtures."""
-import sys
-import os
+"""Shared test fixtures."""
 import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
\ No newline at end of file
+from src.main import BanditCLIApp
+
+# App state that tests set directly and the app fixture puts back
+_RESET_ATTRIBUTES = ("offline_mode", "ssh_connected", "current_level")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _no_retry_delay():
+    """Retry failed SSH connections immediately instead of sleeping between attempts."""
+    with pytest.MonkeyPatch.context() as patcher:
+        patcher.setattr("src.ssh_manager.RETRY_DELAY", 0)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _stop_patches():
+    """Undo any patch started with start() that a failing test left active."""
+    yield
+    patch.stopall()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    """Drop fixture values once a test is torn down.
+    
+    pytest keeps every item, and with it the mocks its fixtures returned, until
+    the session ends.
+    """
+    yield
+    item.funcargs.clear()
+
+
+def _any_call(*args, **kwargs):
+    """Signature that accepts any call; used as the spec for call recorders."""
+
+
+@pytest.fixture
+def recorder():
+    """Build mocks that only record calls, for stand-ins such as app.notify.
+    
+    spec_set stops the mock creating child mocks for unknown attributes, so a
+    typo fails loudly and attribute access stays cheap. Keep plain Mock for
+    widgets whose methods are called, such as the mentor chat.
+    """
+    return lambda: Mock(spec_set=_any_call)
+
+
+@pytest.fixture(scope="module")
+def shared_app():
+    """One BanditCLIApp per test module; building it loads config, history and level data."""
+    return BanditCLIApp()
+
+
+@pytest.fixture
+def app(shared_app):
+    """The module's shared app, with its state restored after each test.
+    
+    Tests replace methods and services with monkeypatch so they are undone too.
+    """
+    saved = {name: getattr(shared_app, name) for name in _RESET_ATTRIBUTES}
+    # Widgets cached by an earlier test would bypass this test's query_one mocks
+    shared_app._widgets.clear()
+    yield shared_app
+    shared_app._widgets.clear()
+    for name, value in saved.items():
+        setattr(shared_app, name, value)
+
+
+@pytest.fixture
+def notify(app, monkeypatch, recorder):
+    """Replace the shared app's notify with a call recorder and return it."""
+    mock = recorder()
+    monkeypatch.setattr(app, "notify", mock)
+    return mock
+
+
+@pytest.fixture
+def make_query_one():
+    """Build query_one replacements that return stand-in widgets by selector.
+    
+    make_query_one(ssh_port="2220") returns a function answering "#ssh_port" with
+    SimpleNamespace(value="2220") and any other selector with a shared Mock.
+    Widgets whose method calls are checked, such as the mentor chat, can be passed
+    in by selector. All stand-ins are available as its widgets attribute.
+    """
+    def factory(widgets=None, **values):
+        widgets = dict(widgets or {})
+        # Inputs only need a value; SimpleNamespace is much cheaper to build than Mock
+        widgets.update((f"#{name}", SimpleNamespace(value=value)) for name, value in values.items())
+        default = Mock()
+        
+        def query_one(selector, expect_type=None):
+            return widgets.get(selector, default)
+        
+        query_one.widgets = widgets
+        return query_one
+    
+    return factory
@@ -0,0 +1,188 @@
+"""Unit tests for the AI mentor module."""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from src.ai_mentor import BanditAIMentor
+from src.prompts import SYSTEM_PROMPT
+
+
+def make_chunk(content=None, usage=None):
+    """Build a streaming chunk shaped like LiteLLM's ModelResponseStream."""
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class TestSystemPrompt:
+    """Test cases for the system prompt message."""
+    
+    def test_cache_control_for_caching_providers(self):
+        """Test that the prompt is marked cacheable only where the provider supports it."""
+        cached = BanditAIMentor(notify_callback=Mock(), model="anthropic/claude-3-5-sonnet-20240620")
+        plain = BanditAIMentor(notify_callback=Mock(), model="ollama/llama3.2")
+        
+        assert cached._system_msg["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in plain._system_msg
+        assert cached._system_msg["content"] == plain._system_msg["content"] == SYSTEM_PROMPT
+
+
+class TestGetResponse:
+    """Test cases for BanditAIMentor.get_response."""
+    
+    def test_streams_chunks_as_they_arrive(self):
+        """Test that each delta is yielded individually."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        stream = [make_chunk("Hel"), make_chunk("lo"), make_chunk("")]
+        
+        with patch('src.ai_mentor.litellm.completion', return_value=iter(stream)) as mock_completion:
+            chunks = list(ai_mentor.get_response("hi", session_id="s1"))
+        
+        assert chunks == ["Hel", "lo"]
+        assert mock_completion.call_args.kwargs["stream"] is True
+        assert mock_completion.call_args.kwargs["stream_options"] == {"include_usage": True}
+        
+        # The joined response is recorded in the conversation history
+        assert ai_mentor.conversation_history["s1"][-1] == {"role": "assistant", "content": "Hello"}
+    
+    def test_context_message_is_trimmed(self):
+        """Test that only the last five commands and 500 output characters are sent."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        commands = [f"cmd{i}" for i in range(8)]
+        output = "x" * 600 + "tail"
+        
+        with patch('src.ai_mentor.litellm.completion', return_value=iter([make_chunk("ok")])) as mock_completion:
+            list(ai_mentor.get_response("hi", current_level=3, recent_commands=commands,
+                                        terminal_output=output))
+        
+        context = mock_completion.call_args.kwargs["messages"][1]["content"]
+        assert context.startswith("Current context: Current level: Bandit Level 3")
+        assert "Recent commands: cmd3, cmd4, cmd5, cmd6, cmd7" in context
+        assert context.endswith("x" * 496 + "tail")
+    
+    def test_records_token_usage(self):
+        """Test that usage from the final chunk is kept per session."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12)
+        stream = [make_chunk("Hi"), make_chunk(usage=usage)]
+        
+        with patch('src.ai_mentor.litellm.completion', return_value=iter(stream)):
+            list(ai_mentor.get_response("hi", session_id="s1"))
+        
+        assert ai_mentor.token_usage["s1"] == {
+            "prompt_tokens": 10,
+            "completion_tokens": 2,
+            "total_tokens": 12
+        }
+        
+        # Clearing the conversation also drops the usage record
+        ai_mentor.clear_conversation("s1")
+        assert "s1" not in ai_mentor.token_usage
+    
+    def test_history_is_bounded(self):
+        """Test that only the last 10 exchanges are kept and sent."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        
+        with patch('src.ai_mentor.litellm.completion', side_effect=lambda **kw: iter([make_chunk("ok")])) as mock_completion:
+            for i in range(15):
+                list(ai_mentor.get_response(f"question {i}", session_id="s1", current_level=None))
+        
+        history = ai_mentor.conversation_history["s1"]
+        assert len(history) == 20
+        assert history[0] == {"role": "user", "content": "question 5"}
+        
+        # The last request carried the system prompt, 20 history entries and the new question
+        messages = mock_completion.call_args.kwargs["messages"]
+        assert messages[0] is ai_mentor._system_msg
+        assert len(messages) == 22
+    
+    def test_least_recent_session_is_evicted(self):
+        """Test that the number of sessions kept in memory is capped."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        
+        with patch('src.ai_mentor.MAX_SESSIONS', 2), \
+             patch('src.ai_mentor.litellm.completion', side_effect=lambda **kw: iter([make_chunk("ok")])):
+            list(ai_mentor.get_response("hi", session_id="s1"))
+            list(ai_mentor.get_response("hi", session_id="s2"))
+            # Touching s1 makes s2 the least recently used
+            list(ai_mentor.get_response("again", session_id="s1"))
+            list(ai_mentor.get_response("hi", session_id="s3"))
+        
+        assert list(ai_mentor.conversation_history) == ["s1", "s3"]
+    
+    def test_repeated_question_is_answered_from_cache(self):
+        """Test that the same question in the same context reuses the earlier reply."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        
+        with patch('src.ai_mentor.litellm.completion', side_effect=lambda **kw: iter([make_chunk("ok")])) as mock_completion:
+            list(ai_mentor.get_response("How do I solve this?", current_level=5, recent_commands=["ls"]))
+            chunks = list(ai_mentor.get_response("how do i solve this? ", current_level=5, recent_commands=["ls"]))
+            assert mock_completion.call_count == 1
+            
+            # A different level or command context is a new question
+            list(ai_mentor.get_response("how do i solve this?", current_level=6, recent_commands=["ls"]))
+            list(ai_mentor.get_response("how do i solve this?", current_level=5, recent_commands=["cat"]))
+            assert mock_completion.call_count == 3
+        
+        assert chunks == ["ok"]
+        assert ai_mentor.get_cached_response("How do I solve this?", 5, ["ls"]) == "ok"
+    
+    def test_response_cache_is_bounded(self):
+        """Test that the least recently used reply is dropped when the cache is full."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        
+        with patch('src.ai_mentor.MAX_CACHED_RESPONSES', 2), \
+             patch('src.ai_mentor.litellm.completion', side_effect=lambda **kw: iter([make_chunk("ok")])):
+            for question in ("q1", "q2", "q3"):
+                list(ai_mentor.get_response(question))
+        
+        assert ai_mentor.get_cached_response("q1") is None
+        assert ai_mentor.get_cached_response("q3") == "ok"
+    
+    def test_error_yields_fallback_message(self):
+        """Test that provider errors are reported and a fallback is yielded."""
+        notify = Mock()
+        ai_mentor = BanditAIMentor(notify_callback=notify)
+        
+        with patch('src.ai_mentor.litellm.completion', side_effect=RuntimeError("boom")):
+            chunks = list(ai_mentor.get_response("hi"))
+        
+        assert chunks == ["I'm sorry, I'm having trouble responding right now. Please try again later."]
+        notify.assert_called_once()
+
+
+class TestBatchGetResponse:
+    """Test cases for BanditAIMentor.batch_get_response."""
+    
+    def test_returns_replies_in_order(self):
+        """Test that concurrent replies are returned in prompt order."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        
+        async def fake_acompletion(model, messages, **kwargs):
+            reply = f"re: {messages[-1]['content']}"
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+        
+        with patch('src.ai_mentor.litellm.acompletion', side_effect=fake_acompletion) as mock_acompletion:
+            responses = ai_mentor.batch_get_response(["a", "b", "c"])
+        
+        assert responses == ["re: a", "re: b", "re: c"]
+        
+        # Every request shares the same system message object
+        system_messages = {id(call.kwargs["messages"][0]) for call in mock_acompletion.call_args_list}
+        assert len(system_messages) == 1
+    
+    def test_failed_request_does_not_sink_batch(self):
+        """Test that one failing request yields a fallback without losing the others."""
+        notify = Mock()
+        ai_mentor = BanditAIMentor(notify_callback=notify)
+        
+        async def fake_acompletion(model, messages, **kwargs):
+            if messages[-1]["content"] == "bad":
+                raise RuntimeError("boom")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+        
+        with patch('src.ai_mentor.litellm.acompletion', side_effect=fake_acompletion):
+            responses = ai_mentor.batch_get_response(["good", "bad"])
+        
+        assert responses[0] == "ok"
+        assert responses[1].startswith("I'm sorry")
+        notify.assert_called_once()
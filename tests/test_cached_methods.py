@@ -1,138 +1,89 @@
 """Unit tests for caching in level info and AI mentor modules."""
 import pytest
-from unittest.mock import Mock, patch
-import sys
-import os
+from unittest.mock import Mock
 
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-
-from level_info import BanditLevelInfo
-from ai_mentor import BanditAIMentor
+from src.level_info import BanditLevelInfo
+from src.ai_mentor import BanditAIMentor, DEFAULT_LEVEL_HINT
 
 
 class TestCachedLevelInfo:
     """Test cases for cached level info methods."""
     
-    def test_get_level_info_uses_cache(self, tmp_path):
-        """Test that get_level_info uses caching."""
-        # Create a BanditLevelInfo instance with test data
+    def test_get_level_info_reads_levels_data(self):
+        """Test that get_level_info returns the loaded entry without a cache round-trip."""
         levels_data = {
-            "0": {"level": 0, "goal": "Test goal", "commands": ["ls", "cat"]},
-            "1": {"level": 1, "goal": "Another goal", "commands": ["pwd", "cd"]}
+            0: {"level": 0, "goal": "Test goal", "commands": ["ls", "cat"]},
+            1: {"level": 1, "goal": "Another goal", "commands": ["pwd", "cd"]}
         }
         
         level_info = BanditLevelInfo()
         level_info.levels_data = levels_data
         
-        # Mock the cache to track calls
-        with patch('level_info.cache') as mock_cache:
-            mock_cache.get.return_value = None  # Not in cache initially
-            
-            # Call get_level_info
-            result1 = level_info.get_level_info(0)
-            
-            # Check that cache.get was called
-            mock_cache.get.assert_called_with("level_info_0")
-            
-            # Check that cache.set was called to store the result
-            mock_cache.set.assert_called_with("level_info_0", result1, ttl=3600)
-            
-            # Call again to verify it uses cache
-            mock_cache.get.return_value = result1  # Now in cache
-            result2 = level_info.get_level_info(0)
-            
-            # Check that the same result is returned
-            assert result1 == result2
-            # Check that cache.get was called again
-            assert mock_cache.get.call_count == 2
+        assert level_info.get_level_info(0) is levels_data[0]
+        assert level_info.get_level_info(99) is None
     
-    def test_format_level_info_uses_cache(self, tmp_path):
-        """Test that format_level_info uses caching."""
-        # Create a BanditLevelInfo instance with test data
-        levels_data = {
-            "0": {"level": 0, "goal": "Test goal", "commands": ["ls", "cat"]},
-        }
+    def test_format_level_info_is_memoized(self):
+        """Test that a level is formatted once per instance."""
+        level_info = BanditLevelInfo()
+        level_info.levels_data = {0: {"level": 0, "goal": "Test goal"}}
+        
+        result1 = level_info.format_level_info(0)
+        # Later lookups do not rebuild the text
+        level_info.levels_data = {}
+        result2 = level_info.format_level_info(0)
+        
+        assert result1 is result2
+        assert "Test goal" in result1
+    
+    def test_levels_data_is_parsed_once(self):
+        """Test that level info instances share a single parse of the levels file."""
+        level_info1 = BanditLevelInfo()
+        level_info2 = BanditLevelInfo()
+        
+        assert level_info1.levels_data
+        assert level_info1.levels_data is level_info2.levels_data
         
+        # The shared data is read-only
+        with pytest.raises(TypeError):
+            level_info1.levels_data["999"] = {}
+    
+    def test_max_level_is_precomputed(self):
+        """Test that the highest level number is worked out once at load time."""
         level_info = BanditLevelInfo()
-        level_info.levels_data = levels_data
         
-        # Mock the cache to track calls
-        with patch('level_info.cache') as mock_cache:
-            mock_cache.get.return_value = None  # Not in cache initially
-            
-            # Call format_level_info
-            result1 = level_info.format_level_info(0)
-            
-            # Check that cache.get was called for the formatted info
-            # Note: get_level_info is also cached, so we might see that call too
-            # We're specifically checking for the formatted_level_info cache key
-            calls = [call[0][0] for call in mock_cache.get.call_args_list]
-            assert "formatted_level_info_0" in calls
-            
-            # Check that cache.set was called to store the result
-            calls = [call[0][0] for call in mock_cache.set.call_args_list]
-            assert "formatted_level_info_0" in calls
-            
-            # Call again to verify it uses cache
-            mock_cache.get.return_value = result1  # Now in cache
-            result2 = level_info.format_level_info(0)
-            
-            # Check that the same result is returned
-            assert result1 == result2
+        assert level_info.max_level == max(level_info.levels_data)
 
 
 class TestCachedAIMentor:
-    """Test cases for cached AI mentor methods."""
+    """Test cases for the preloaded AI mentor data."""
+    
+    @pytest.mark.parametrize("method,arg,mapping,key", [
+        ("get_level_hint", 0, "level_hints", "0"),
+        # Command lookups are case-insensitive
+        ("explain_command", "LS", "command_explanations", "ls"),
+    ])
+    def test_lookup_uses_preloaded_data(self, method, arg, mapping, key):
+        """Test that hint and explanation lookups read from the shared mappings."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
+        
+        assert getattr(ai_mentor, method)(arg) == getattr(ai_mentor, mapping)[key]
     
-    def test_get_level_hint_uses_cache(self):
-        """Test that get_level_hint uses caching."""
-        ai_mentor = BanditAIMentor()
+    @pytest.mark.parametrize("method,arg,expected", [
+        # Unknown levels fall back to the generic hint
+        ("get_level_hint", 999, DEFAULT_LEVEL_HINT),
+        # Unknown commands point to the man page
+        ("explain_command", "xyz", "'xyz' is a Linux command. Try 'man xyz' to learn more about it."),
+    ])
+    def test_lookup_falls_back(self, method, arg, expected):
+        """Test the fallback text for levels and commands missing from the data file."""
+        ai_mentor = BanditAIMentor(notify_callback=Mock())
         
-        # Mock the cache to track calls
-        with patch('ai_mentor.cache') as mock_cache:
-            mock_cache.get.return_value = None  # Not in cache initially
-            
-            # Call get_level_hint
-            result1 = ai_mentor.get_level_hint(0)
-            
-            # Check that cache.get was called
-            mock_cache.get.assert_called_with("level_hint_0")
-            
-            # Check that cache.set was called to store the result
-            mock_cache.set.assert_called_with("level_hint_0", result1, ttl=3600)
-            
-            # Call again to verify it uses cache
-            mock_cache.get.return_value = result1  # Now in cache
-            result2 = ai_mentor.get_level_hint(0)
-            
-            # Check that the same result is returned
-            assert result1 == result2
-            # Check that cache.get was called again
-            assert mock_cache.get.call_count == 2
+        assert getattr(ai_mentor, method)(arg) == expected
     
-    def test_explain_command_uses_cache(self):
-        """Test that explain_command uses caching."""
-        ai_mentor = BanditAIMentor()
+    def test_data_is_parsed_once(self):
+        """Test that mentor instances share a single parse of the data file."""
+        ai_mentor1 = BanditAIMentor(notify_callback=Mock())
+        ai_mentor2 = BanditAIMentor(notify_callback=Mock())
         
-        # Mock the cache to track calls
-        with patch('ai_mentor.cache') as mock_cache:
-            mock_cache.get.return_value = None  # Not in cache initially
-            
-            # Call explain_command
-            result1 = ai_mentor.explain_command("ls")
-            
-            # Check that cache.get was called
-            mock_cache.get.assert_called_with("command_explanation_ls")
-            
-            # Check that cache.set was called to store the result
-            mock_cache.set.assert_called_with("command_explanation_ls", result1, ttl=3600)
-            
-            # Call again to verify it uses cache
-            mock_cache.get.return_value = result1  # Now in cache
-            result2 = ai_mentor.explain_command("ls")
-            
-            # Check that the same result is returned
-            assert result1 == result2
-            # Check that cache.get was called again
-            assert mock_cache.get.call_count == 2
\ No newline at end of file
+        assert ai_mentor1.level_hints is ai_mentor2.level_hints
+        assert ai_mentor1.command_explanations is ai_mentor2.command_explanations
@@ -1,26 +1,30 @@
 """Unit tests for the command history module."""
+import gc
+import weakref
 import pytest
-import os
 import json
 from pathlib import Path
-import sys
+from unittest.mock import patch
 
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-
-from command_history import CommandHistory
+from src.command_history import CommandHistory
 
 
 class TestCommandHistory:
     """Test cases for the CommandHistory class."""
     
+    @staticmethod
+    def _saved_lines(history_file):
+        """Read the commands stored in a history file, oldest first."""
+        with open(history_file, 'r') as f:
+            return [json.loads(line) for line in f]
+    
     def test_init_with_defaults(self):
         """Test initialization with default values."""
         history = CommandHistory()
         
         assert history.max_size == 100
         assert history.history_file is None
-        assert history.commands == []
+        assert list(history.commands) == []
         assert history.index == -1
     
     def test_init_with_custom_values(self, tmp_path):
@@ -30,7 +34,7 @@ class TestCommandHistory:
         
         assert history.max_size == 50
         assert history.history_file == str(history_file)
-        assert history.commands == []
+        assert list(history.commands) == []
         assert history.index == -1
     
     def test_add_command(self):
@@ -39,23 +43,23 @@ class TestCommandHistory:
         
         # Add a command
         history.add_command("ls -la")
-        assert history.commands == ["ls -la"]
+        assert list(history.commands) == ["ls -la"]
         
         # Add another command
         history.add_command("pwd")
-        assert history.commands == ["pwd", "ls -la"]
+        assert list(history.commands) == ["pwd", "ls -la"]
         
         # Add a duplicate command (should move it to the front)
         history.add_command("ls -la")
-        assert history.commands == ["ls -la", "pwd"]
+        assert list(history.commands) == ["ls -la", "pwd"]
         
         # Add an empty command (should be ignored)
         history.add_command("")
-        assert history.commands == ["ls -la", "pwd"]
+        assert list(history.commands) == ["ls -la", "pwd"]
         
         # Add a command with whitespace (should be stripped)
         history.add_command("  cd /home  ")
-        assert history.commands == ["cd /home", "ls -la", "pwd"]
+        assert list(history.commands) == ["cd /home", "ls -la", "pwd"]
     
     def test_add_command_limit_size(self):
         """Test that history is limited to max_size."""
@@ -67,7 +71,7 @@ class TestCommandHistory:
         
         # Should only keep the last max_size commands
         assert len(history.commands) == 3
-        assert history.commands == ["command4", "command3", "command2"]
+        assert list(history.commands) == ["command4", "command3", "command2"]
     
     def test_get_previous_command(self):
         """Test getting previous commands from history."""
@@ -135,11 +139,15 @@ class TestCommandHistory:
         
         # Get all commands
         all_commands = history.get_all_commands()
-        assert all_commands == ["cmd3", "cmd2", "cmd1"]
+        assert all_commands == ("cmd3", "cmd2", "cmd1")
         
         # Verify it's a copy (modifying it doesn't affect the original)
+        all_commands = list(all_commands)
         all_commands.append("cmd4")
-        assert history.commands == ["cmd3", "cmd2", "cmd1"]
+        assert list(history.commands) == ["cmd3", "cmd2", "cmd1"]
+        
+        # Read-only callers can iterate without a copy
+        assert list(history.iter_commands()) == ["cmd3", "cmd2", "cmd1"]
     
     def test_clear_history(self):
         """Test clearing history."""
@@ -151,7 +159,7 @@ class TestCommandHistory:
         
         # Clear history
         history.clear_history()
-        assert history.commands == []
+        assert list(history.commands) == []
         assert history.index == -1
     
     def test_save_history(self, tmp_path):
@@ -169,10 +177,8 @@ class TestCommandHistory:
         # Check that file was created
         assert history_file.exists()
         
-        # Check file contents
-        with open(history_file, 'r') as f:
-            saved_commands = json.load(f)
-        assert saved_commands == ["cmd2", "cmd1"]
+        # Check file contents: one JSON line per command, oldest first
+        assert self._saved_lines(history_file) == ["cmd1", "cmd2"]
     
     def test_load_history(self, tmp_path):
         """Test loading history from file."""
@@ -187,7 +193,7 @@ class TestCommandHistory:
         history = CommandHistory(history_file=str(history_file))
         
         # Check that commands were loaded
-        assert history.commands == commands
+        assert list(history.commands) == commands
     
     def test_load_history_limit_size(self, tmp_path):
         """Test that loaded history is limited to max_size."""
@@ -203,4 +209,192 @@ class TestCommandHistory:
         
         # Check that only max_size commands were loaded
         assert len(history.commands) == 5
-        assert history.commands == commands[:5]
\ No newline at end of file
+        assert list(history.commands) == commands[:5]
+    
+    def test_add_command_defers_save(self, tmp_path):
+        """Test that adding commands schedules a save instead of writing immediately."""
+        history_file = tmp_path / "history.json"
+        history = CommandHistory(history_file=str(history_file), save_delay=60)
+        
+        history.add_command("cmd1")
+        history.add_command("cmd2")
+        
+        # Nothing written yet
+        assert not history_file.exists()
+        
+        # Flushing writes the pending changes once
+        history.flush()
+        assert self._saved_lines(history_file) == ["cmd1", "cmd2"]
+        assert history._save_timer is None
+    
+    def test_delayed_save_runs(self, tmp_path):
+        """Test that the debounced save eventually writes to disk."""
+        history_file = tmp_path / "history.json"
+        history = CommandHistory(history_file=str(history_file), save_delay=0.01)
+        
+        history.add_command("cmd1")
+        history._save_timer.join(timeout=1)
+        
+        assert self._saved_lines(history_file) == ["cmd1"]
+    
+    def test_eviction_forgets_dropped_commands(self):
+        """Test that commands evicted by max_size can be re-added as new entries."""
+        history = CommandHistory(max_size=2)
+        
+        history.add_command("cmd1")
+        history.add_command("cmd2")
+        history.add_command("cmd3")  # evicts cmd1
+        assert list(history.commands) == ["cmd3", "cmd2"]
+        
+        history.add_command("cmd1")  # evicts cmd2
+        assert list(history.commands) == ["cmd1", "cmd3"]
+        assert history._seen == {"cmd1", "cmd3"}
+    
+    def test_load_history_ignores_invalid_file(self, tmp_path):
+        """Test that a history file that is not a list of commands is ignored."""
+        history_file = tmp_path / "history.json"
+        with open(history_file, 'w') as f:
+            json.dump({"not": "a list"}, f)
+        
+        history = CommandHistory(history_file=str(history_file))
+        
+        assert list(history.commands) == []
+    
+    def test_load_history_skips_oversized_file(self, tmp_path):
+        """Test that absurdly large history files are not loaded."""
+        history_file = tmp_path / "history.json"
+        with open(history_file, 'w') as f:
+            json.dump(["cmd1"], f)
+        
+        with patch('src.command_history.MAX_HISTORY_FILE_BYTES', 1):
+            history = CommandHistory(history_file=str(history_file))
+        
+        assert list(history.commands) == []
+    
+    def test_lazy_load_merges_behind_new_commands(self, tmp_path):
+        """Test that a deferred load keeps commands entered before it finished."""
+        history_file = tmp_path / "history.json"
+        with open(history_file, 'w') as f:
+            json.dump(["cmd2", "cmd1"], f)
+        
+        history = CommandHistory(history_file=str(history_file), save_delay=60, lazy=True)
+        assert list(history.commands) == []
+        
+        history.add_command("cmd3")
+        history.add_command("cmd1")
+        history.merge_commands(history.read_history_file())
+        
+        assert list(history.commands) == ["cmd1", "cmd3", "cmd2"]
+        history.flush()
+        assert self._saved_lines(history_file) == ["cmd2", "cmd3", "cmd1"]
+    
+    def test_new_commands_are_appended(self, tmp_path):
+        """Test that saves after the first only append the new commands."""
+        history_file = tmp_path / "history.json"
+        history = CommandHistory(history_file=str(history_file), save_delay=60)
+        history.add_command("cmd1")
+        history.flush()
+        
+        history.add_command("cmd2")
+        with patch.object(history, 'save_history') as mock_save:
+            history.flush()
+        
+        mock_save.assert_not_called()
+        assert self._saved_lines(history_file) == ["cmd1", "cmd2"]
+        
+        # Reloading puts the most recent command first
+        reloaded = CommandHistory(history_file=str(history_file))
+        assert list(reloaded.commands) == ["cmd2", "cmd1"]
+    
+    def test_history_is_not_kept_alive_for_exit_flush(self, tmp_path):
+        """Test that registering for the exit-time flush does not keep the history alive."""
+        history = CommandHistory(history_file=str(tmp_path / "history.json"), save_delay=60)
+        history.add_command("cmd1")
+        history.flush()
+        ref = weakref.ref(history)
+        
+        del history
+        gc.collect()
+        
+        assert ref() is None
+    
+    def test_unsaved_commands_not_kept_without_file(self):
+        """Test that a history without a file doesn't queue commands for saving."""
+        history = CommandHistory(max_size=3)
+        
+        for i in range(10):
+            history.add_command(f"cmd{i}")
+        
+        assert len(history.commands) == 3
+        assert history._unsaved == []
+    
+    def test_failed_write_is_retried(self, tmp_path):
+        """Test that commands from a failed write are saved by the next flush."""
+        history_file = tmp_path / "history.json"
+        history = CommandHistory(history_file=str(history_file), save_delay=60)
+        history.add_command("cmd1")
+        history.flush()
+        history.add_command("cmd2")
+        
+        with patch.object(history, '_encode', side_effect=OSError("disk full")):
+            history.flush()
+        
+        assert history._dirty is True
+        history.flush()
+        assert self._saved_lines(history_file) == ["cmd1", "cmd2"]
+    
+    def test_command_added_during_write_is_saved(self, tmp_path):
+        """Test that a command entered while a save is writing goes out with the next save."""
+        history_file = tmp_path / "history.json"
+        history = CommandHistory(history_file=str(history_file), save_delay=60)
+        history.add_command("cmd1")
+        history.flush()
+        history.add_command("cmd2")
+        
+        def encode_and_add(commands):
+            history.add_command("cmd3")
+            return CommandHistory._encode(commands)
+        
+        with patch.object(history, '_encode', side_effect=encode_and_add):
+            history.flush()
+        assert self._saved_lines(history_file) == ["cmd1", "cmd2"]
+        
+        history.flush()
+        assert self._saved_lines(history_file) == ["cmd1", "cmd2", "cmd3"]
+    
+    def test_history_file_is_compacted(self, tmp_path):
+        """Test that the file is rewritten once it grows past twice the history size."""
+        history_file = tmp_path / "history.json"
+        history = CommandHistory(max_size=2, history_file=str(history_file), save_delay=60)
+        
+        for i in range(6):
+            history.add_command(f"cmd{i}")
+            history.flush()
+        
+        assert len(self._saved_lines(history_file)) <= 4
+        assert self._saved_lines(history_file)[-2:] == ["cmd4", "cmd5"]
+    
+    def test_load_skips_torn_lines(self, tmp_path):
+        """Test that a partly written last line doesn't lose the rest of the history."""
+        history_file = tmp_path / "history.json"
+        history_file.write_text('"cmd1"\n"cmd2"\n"cmd1"\n"cm')
+        
+        history = CommandHistory(history_file=str(history_file))
+        
+        assert list(history.commands) == ["cmd1", "cmd2"]
+    
+    def test_navigation_uses_snapshot(self):
+        """Test that navigation walks the history as it was when navigation started."""
+        history = CommandHistory()
+        history.add_command("cmd1")
+        history.add_command("cmd2")
+        
+        assert history.get_previous_command() == "cmd2"
+        # Older commands merged in mid-navigation don't shift the walk
+        history.merge_commands(["cmd0"])
+        assert history.get_previous_command() == "cmd1"
+        assert history.get_previous_command() is None
+        
+        # The next walk sees the merged command
+        history.reset_index()
+        assert [history.get_previous_command() for _ in range(3)] == ["cmd2", "cmd1", "cmd0"]
@@ -1,165 +1,66 @@
 """Unit tests for the CommandInput class."""
+import asyncio
 import pytest
 from unittest.mock import Mock, patch
-import sys
-import os
 
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from textual.app import App
+from src.main import CommandInput
 
-from main import CommandInput
+
+@pytest.fixture
+def input_widget():
+    """A CommandInput backed by a mock history."""
+    return CommandInput(Mock())
 
 
 class TestCommandInput:
     """Test cases for the CommandInput class."""
     
-    def test_init(self):
+    def test_init(self, input_widget):
         """Test CommandInput initialization."""
-        mock_history = Mock()
-        input_widget = CommandInput(mock_history)
-        
-        assert input_widget.command_history == mock_history
+        assert isinstance(input_widget.command_history, Mock)
     
-    @patch('main.Key')
-    def test_on_key_up_arrow(self, mock_key):
-        """Test handling up arrow key press."""
-        mock_history = Mock()
-        mock_history.get_previous_command.return_value = "previous command"
-        input_widget = CommandInput(mock_history)
+    @pytest.mark.parametrize("action,history_method,returned,expected", [
+        ("action_history_prev", "get_previous_command", "previous command", "previous command"),
+        ("action_history_prev", "get_previous_command", None, "current command"),
+        ("action_history_next", "get_next_command", "next command", "next command"),
+        ("action_history_next", "get_next_command", None, "current command"),
+    ])
+    def test_history_navigation(self, input_widget, action, history_method, returned, expected):
+        """Test that history actions show the returned command and keep the input otherwise."""
+        getattr(input_widget.command_history, history_method).return_value = returned
         input_widget.value = "current command"
         
-        # Create a mock key event for up arrow
-        mock_event = Mock()
-        mock_event.key = "up"
-        mock_key.return_value = mock_event
-        
-        # Call on_key
-        input_widget.on_key(mock_event)
+        getattr(input_widget, action)()
         
-        # Check that the previous command was retrieved
-        mock_history.get_previous_command.assert_called_once()
-        
-        # Check that the input value was updated
-        assert input_widget.value == "previous command"
-        assert input_widget.cursor_position == len("previous command")
-        
-        # Check that prevent_default was called
-        mock_event.prevent_default.assert_called_once()
+        getattr(input_widget.command_history, history_method).assert_called_once()
+        assert input_widget.value == expected
+        if returned is not None:
+            assert input_widget.cursor_position == len(returned)
     
-    @patch('main.Key')
-    def test_on_key_up_arrow_no_command(self, mock_key):
-        """Test handling up arrow key press when no previous command exists."""
+    def test_keys_are_bound(self):
+        """Test that up/down go through bindings and other keys leave history alone."""
         mock_history = Mock()
-        mock_history.get_previous_command.return_value = None
-        input_widget = CommandInput(mock_history)
-        input_widget.value = "current command"
+        mock_history.get_previous_command.return_value = "previous command"
         
-        # Create a mock key event for up arrow
-        mock_event = Mock()
-        mock_event.key = "up"
-        mock_key.return_value = mock_event
+        class InputApp(App):
+            def compose(self):
+                yield CommandInput(mock_history)
         
-        # Call on_key
-        input_widget.on_key(mock_event)
+        async def run():
+            app = InputApp()
+            async with app.run_test() as pilot:
+                await pilot.press("a", "up")
+                return app.query_one(CommandInput).value
         
-        # Check that the previous command was retrieved
+        assert asyncio.run(run()) == "previous command"
         mock_history.get_previous_command.assert_called_once()
-        
-        # Check that the input value was not changed
-        assert input_widget.value == "current command"
-        
-        # Check that prevent_default was not called
-        mock_event.prevent_default.assert_not_called()
-    
-    @patch('main.Key')
-    def test_on_key_down_arrow(self, mock_key):
-        """Test handling down arrow key press."""
-        mock_history = Mock()
-        mock_history.get_next_command.return_value = "next command"
-        input_widget = CommandInput(mock_history)
-        input_widget.value = "current command"
-        
-        # Create a mock key event for down arrow
-        mock_event = Mock()
-        mock_event.key = "down"
-        mock_key.return_value = mock_event
-        
-        # Call on_key
-        input_widget.on_key(mock_event)
-        
-        # Check that the next command was retrieved
-        mock_history.get_next_command.assert_called_once()
-        
-        # Check that the input value was updated
-        assert input_widget.value == "next command"
-        assert input_widget.cursor_position == len("next command")
-        
-        # Check that prevent_default was called
-        mock_event.prevent_default.assert_called_once()
-    
-    @patch('main.Key')
-    def test_on_key_down_arrow_no_command(self, mock_key):
-        """Test handling down arrow key press when no next command exists."""
-        mock_history = Mock()
-        mock_history.get_next_command.return_value = None
-        input_widget = CommandInput(mock_history)
-        input_widget.value = "current command"
-        
-        # Create a mock key event for down arrow
-        mock_event = Mock()
-        mock_event.key = "down"
-        mock_key.return_value = mock_event
-        
-        # Call on_key
-        input_widget.on_key(mock_event)
-        
-        # Check that the next command was retrieved
-        mock_history.get_next_command.assert_called_once()
-        
-        # Check that the input value was not changed
-        assert input_widget.value == "current command"
-        
-        # Check that prevent_default was not called
-        mock_event.prevent_default.assert_not_called()
+        mock_history.get_next_command.assert_not_called()
     
-    @patch('main.Key')
-    def test_on_key_enter(self, mock_key):
-        """Test handling enter key press."""
-        mock_history = Mock()
-        input_widget = CommandInput(mock_history)
-        
-        # Create a mock key event for enter
-        mock_event = Mock()
-        mock_event.key = "enter"
-        mock_key.return_value = mock_event
-        
-        # Call on_key
-        input_widget.on_key(mock_event)
+    def test_submit_resets_index(self, input_widget):
+        """Test that submitting the input resets the history index."""
+        with patch.object(input_widget, 'post_message'):
+            asyncio.run(input_widget.action_submit())
         
         # Check that reset_index was called
-        mock_history.reset_index.assert_called_once()
-        
-        # Check that prevent_default was not called
-        mock_event.prevent_default.assert_not_called()
-    
-    @patch('main.Key')
-    def test_on_key_other_key(self, mock_key):
-        """Test handling other key presses."""
-        mock_history = Mock()
-        input_widget = CommandInput(mock_history)
-        
-        # Create a mock key event for a different key
-        mock_event = Mock()
-        mock_event.key = "a"
-        mock_key.return_value = mock_event
-        
-        # Call on_key
-        input_widget.on_key(mock_event)
-        
-        # Check that no history methods were called
-        mock_history.get_previous_command.assert_not_called()
-        mock_history.get_next_command.assert_not_called()
-        mock_history.reset_index.assert_not_called()
-        
-        # Check that prevent_default was not called
-        mock_event.prevent_default.assert_not_called()
\ No newline at end of file
+        input_widget.command_history.reset_index.assert_called_once()
@@ -1,14 +1,11 @@
 """Unit tests for the configuration module."""
 import pytest
-import os
 import json
+import os
 from pathlib import Path
-import sys
-
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from unittest.mock import patch
 
-from config import ConfigManager
+from src.config import ConfigManager
 
 
 class TestConfigManager:
@@ -95,4 +92,73 @@ class TestConfigManager:
         
         # Also test that a new manager instance loads the reset values
         manager2 = ConfigManager(str(config_file))
-        assert manager2.get("ssh.port") == 2220
\ No newline at end of file
+        assert manager2.get("ssh.port") == 2220
+    
+    def test_set_invalidates_resolved_values(self, tmp_path):
+        """Test that values looked up earlier reflect later changes."""
+        config_file = tmp_path / "config.json"
+        manager = ConfigManager(str(config_file))
+        
+        # Resolve a missing key and an existing one
+        assert manager.get("ui.font_size", 12) == 12
+        assert manager.get("ssh.port") == 2220
+        
+        manager.set("ui.font_size", 14)
+        manager.set("ssh.port", 3000)
+        
+        assert manager.get("ui.font_size", 12) == 14
+        assert manager.get("ssh.port") == 3000
+        # Paths through a non-dict value fall back to the default
+        assert manager.get("ssh.port.number", "none") == "none"
+    
+    def test_save_leaves_no_temp_file(self, tmp_path):
+        """Test that saving swaps the config file into place atomically."""
+        config_file = tmp_path / "config.json"
+        manager = ConfigManager(str(config_file))
+        
+        manager.set("ssh.port", 3000)
+        
+        assert config_file.exists()
+        assert not config_file.with_suffix(".tmp").exists()
+        assert ConfigManager(str(config_file)).get("ssh.port") == 3000
+    
+    def test_changes_do_not_leak_into_defaults(self, tmp_path):
+        """Test that loaded and set values never modify the default configuration."""
+        config_file = tmp_path / "config.json"
+        with open(config_file, 'w') as f:
+            json.dump({"ssh": {"port": 2222, "extra": {"nested": True}}}, f)
+        
+        manager = ConfigManager(str(config_file))
+        manager.set("ui.theme", "light")
+        
+        assert manager.get("ssh.extra.nested") is True
+        assert manager.default_config["ssh"]["port"] == 2220
+        assert "extra" not in manager.default_config["ssh"]
+        assert manager.default_config["ui"]["theme"] == "dark"
+    
+    def test_unchanged_config_is_not_rewritten(self, tmp_path):
+        """Test that saving the same configuration again skips the write."""
+        manager = ConfigManager(str(tmp_path / "config.json"))
+        manager.set("ssh.port", 3000)
+        
+        with patch('src.config.os.replace') as mock_replace:
+            manager.set("ssh.port", 3000)
+            manager.save_config()
+        
+        mock_replace.assert_not_called()
+    
+    def test_batch_saves_once(self, tmp_path):
+        """Test that set() calls inside batch() are written in a single save."""
+        config_file = tmp_path / "config.json"
+        manager = ConfigManager(str(config_file))
+        
+        with patch('src.config.os.replace', wraps=os.replace) as mock_replace:
+            with manager.batch():
+                manager.set("ssh.port", 3000)
+                manager.set("ui.theme", "light")
+                assert not config_file.exists()
+        
+        mock_replace.assert_called_once()
+        reloaded = ConfigManager(str(config_file))
+        assert reloaded.get("ssh.port") == 3000
+        assert reloaded.get("ui.theme") == "light"
@@ -1,226 +1,79 @@
 """Unit tests for enhanced error handling and input validation."""
 import pytest
-from unittest.mock import Mock, patch
-import sys
-import os
+from unittest.mock import Mock
 
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-
-from main import BanditCLIApp
+# One character over the input length limit
+_TOO_LONG = "a" * 1001
 
 
 class TestErrorHandlingAndValidation:
     """Test cases for enhanced error handling and input validation."""
     
-    def test_connect_ssh_missing_credentials(self):
-        """Test SSH connection with missing credentials."""
-        app = BanditCLIApp()
+    @pytest.mark.parametrize("username, password, port, timeout, message", [
+        ("", "", "2220", "10", "Please enter both username and password"),
+        ("bandit0", "bandit0", "invalid", "10", "Port must be a valid number"),
+        ("bandit0", "bandit0", "70000", "10", "Port must be between 1 and 65535"),
+        # Only plain ASCII digits are accepted for port and timeout
+        ("bandit0", "bandit0", "２２２０", "10", "Port must be a valid number"),
+        ("bandit0", "bandit0", "-1", "10", "Port must be a valid number"),
+        ("bandit0", "bandit0", "2220", "ten", "Timeout must be a valid number"),
+    ])
+    def test_connect_ssh_rejects_invalid_input(self, username, password, port, timeout, message,
+                                               app, monkeypatch, notify, make_query_one):
+        """Test that SSH connection input is validated before connecting."""
+        monkeypatch.setattr(app, "query_one", make_query_one(
+            ssh_username=username, ssh_password=password, ssh_port=port, ssh_timeout=timeout))
         
-        # Mock the query_one method to return inputs with empty values
-        with patch.object(app, 'query_one') as mock_query:
-            # Mock username and password inputs with empty values
-            mock_username_input = Mock()
-            mock_username_input.value = ""
-            mock_password_input = Mock()
-            mock_password_input.value = ""
-            mock_port_input = Mock()
-            mock_port_input.value = "2220"
-            
-            # Set up the mock to return the appropriate inputs
-            def query_one_side_effect(query, input_type=None):
-                if "#ssh_username" in query:
-                    return mock_username_input
-                elif "#ssh_password" in query:
-                    return mock_password_input
-                elif "#ssh_port" in query:
-                    return mock_port_input
-                else:
-                    return Mock()
-                    
-            mock_query.side_effect = query_one_side_effect
-            
-            # Mock the notify method to capture calls
-            app.notify = Mock()
-            
-            # Call connect_ssh
-            app.connect_ssh()
-            
-            # Check that notify was called with the correct error message
-            app.notify.assert_called_once_with("Please enter both username and password", severity="error")
-    
-    def test_connect_ssh_invalid_port(self):
-        """Test SSH connection with invalid port."""
-        app = BanditCLIApp()
+        app.connect_ssh()
         
-        # Mock the query_one method to return inputs with invalid port
-        with patch.object(app, 'query_one') as mock_query:
-            # Mock inputs with valid username/password but invalid port
-            mock_username_input = Mock()
-            mock_username_input.value = "bandit0"
-            mock_password_input = Mock()
-            mock_password_input.value = "bandit0"
-            mock_port_input = Mock()
-            mock_port_input.value = "invalid"
-            
-            # Set up the mock to return the appropriate inputs
-            def query_one_side_effect(query, input_type=None):
-                if "#ssh_username" in query:
-                    return mock_username_input
-                elif "#ssh_password" in query:
-                    return mock_password_input
-                elif "#ssh_port" in query:
-                    return mock_port_input
-                else:
-                    return Mock()
-                    
-            mock_query.side_effect = query_one_side_effect
-            
-            # Mock the notify method to capture calls
-            app.notify = Mock()
-            
-            # Call connect_ssh
-            app.connect_ssh()
-            
-            # Check that notify was called with the correct error message
-            app.notify.assert_called_once_with("Port must be a valid number", severity="error")
-    
-    def test_connect_ssh_port_out_of_range(self):
-        """Test SSH connection with port out of range."""
-        app = BanditCLIApp()
-        
-        # Mock the query_one method to return inputs with out of range port
-        with patch.object(app, 'query_one') as mock_query:
-            # Mock inputs with valid username/password but out of range port
-            mock_username_input = Mock()
-            mock_username_input.value = "bandit0"
-            mock_password_input = Mock()
-            mock_password_input.value = "bandit0"
-            mock_port_input = Mock()
-            mock_port_input.value = "70000"  # Out of range
-            
-            # Set up the mock to return the appropriate inputs
-            def query_one_side_effect(query, input_type=None):
-                if "#ssh_username" in query:
-                    return mock_username_input
-                elif "#ssh_password" in query:
-                    return mock_password_input
-                elif "#ssh_port" in query:
-                    return mock_port_input
-                else:
-                    return Mock()
-                    
-            mock_query.side_effect = query_one_side_effect
-            
-            # Mock the notify method to capture calls
-            app.notify = Mock()
-            
-            # Call connect_ssh
-            app.connect_ssh()
-            
-            # Check that notify was called with the correct error message
-            app.notify.assert_called_once_with("Port must be between 1 and 65535", severity="error")
+        # Check that notify was called with the correct error message
+        notify.assert_called_once_with(message, severity="error")
     
-    def test_send_command_not_connected(self):
+    def test_send_command_not_connected(self, app, notify):
         """Test sending command when not connected."""
-        app = BanditCLIApp()
         app.ssh_connected = False
         
-        # Mock the notify method to capture calls
-        app.notify = Mock()
-        
         # Call send_command
         app.send_command()
         
         # Check that notify was called with the correct error message
-        app.notify.assert_called_once_with("Not connected to SSH server", severity="error")
+        notify.assert_called_once_with("Not connected to SSH server", severity="error")
     
-    def test_send_command_too_long(self):
-        """Test sending command that is too long."""
-        app = BanditCLIApp()
+    @pytest.mark.parametrize("input_id, method, message", [
+        ("command_input", "send_command", "Command is too long (maximum 1000 characters)"),
+        ("mentor_input", "send_mentor_message", "Message is too long (maximum 1000 characters)"),
+    ])
+    def test_input_too_long(self, input_id, method, message, app, monkeypatch, notify, make_query_one):
+        """Test that commands and mentor messages over 1000 characters are rejected."""
         app.ssh_connected = True
+        monkeypatch.setattr(app, "query_one", make_query_one(**{input_id: _TOO_LONG}))
         
-        # Mock the query_one method to return input with long command
-        with patch.object(app, 'query_one') as mock_query:
-            # Mock command input with long value
-            mock_command_input = Mock()
-            mock_command_input.value = "a" * 1001  # Too long
-            
-            # Set up the mock to return the command input
-            def query_one_side_effect(query, input_type=None):
-                if "#command_input" in query:
-                    return mock_command_input
-                else:
-                    return Mock()
-                    
-            mock_query.side_effect = query_one_side_effect
-            
-            # Mock the notify method to capture calls
-            app.notify = Mock()
-            
-            # Call send_command
-            app.send_command()
-            
-            # Check that notify was called with the correct error message
-            app.notify.assert_called_once_with("Command is too long (maximum 1000 characters)", severity="error")
-    
-    def test_send_mentor_message_too_long(self):
-        """Test sending mentor message that is too long."""
-        app = BanditCLIApp()
+        getattr(app, method)()
         
-        # Mock the query_one method to return input with long message
-        with patch.object(app, 'query_one') as mock_query:
-            # Mock mentor input with long value
-            mock_mentor_input = Mock()
-            mock_mentor_input.value = "a" * 1001  # Too long
-            
-            # Set up the mock to return the mentor input
-            def query_one_side_effect(query, input_type=None):
-                if "#mentor_input" in query:
-                    return mock_mentor_input
-                else:
-                    return Mock()
-                    
-            mock_query.side_effect = query_one_side_effect
-            
-            # Mock the notify method to capture calls
-            app.notify = Mock()
-            
-            # Call send_mentor_message
-            app.send_mentor_message()
-            
-            # Check that notify was called with the correct error message
-            app.notify.assert_called_once_with("Message is too long (maximum 1000 characters)", severity="error")
+        # Check that notify was called with the correct error message
+        notify.assert_called_once_with(message, severity="error")
     
-    def test_previous_level_at_first_level(self):
+    def test_previous_level_at_first_level(self, app, notify):
         """Test navigating to previous level when already at first level."""
-        app = BanditCLIApp()
         app.current_level = 0
         
-        # Mock the notify method to capture calls
-        app.notify = Mock()
-        
         # Call previous_level
         app.previous_level()
         
         # Check that notify was called with the correct warning message
-        app.notify.assert_called_once_with("Already at the first level", severity="warning")
+        notify.assert_called_once_with("Already at the first level", severity="warning")
     
-    def test_next_level_beyond_available_levels(self):
+    def test_next_level_beyond_available_levels(self, app, monkeypatch, notify):
         """Test navigating to next level beyond available levels."""
-        app = BanditCLIApp()
         app.current_level = 10  # Set to a high level
         
         # Mock the level_info to return a limited set of levels
         mock_level_info = Mock()
-        mock_level_info.get_all_levels.return_value = {"0": {}, "1": {}, "2": {}}
-        app.level_info = mock_level_info
-        
-        # Mock the notify method to capture calls
-        app.notify = Mock()
+        mock_level_info.max_level = 2
+        monkeypatch.setattr(app, "level_info", mock_level_info)
         
         # Call next_level
         app.next_level()
         
         # Check that notify was called with the correct warning message
-        app.notify.assert_called_once_with("Level 10 is the highest available level", severity="warning")
\ No newline at end of file
+        notify.assert_called_once_with("Level 10 is the highest available level", severity="warning")
\ No newline at end of file
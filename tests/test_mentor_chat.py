@@ -0,0 +1,47 @@
+"""Unit tests for streaming AI mentor replies into the chat."""
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock
+
+from src.main import BanditCLIApp
+
+
+class TestMentorChat:
+    """Test cases for BanditCLIApp.send_mentor_message."""
+    
+    def test_reply_streams_from_worker_thread(self):
+        """Test that the reply is produced off the UI thread and appended to the chat."""
+        threads = []
+        
+        def fake_response(*args, **kwargs):
+            threads.append(threading.current_thread())
+            yield "Hel"
+            yield "lo"
+        
+        async def run():
+            app = BanditCLIApp()
+            app.ai_mentor.get_response = fake_response
+            async with app.run_test() as pilot:
+                app.query_one("#mentor_input").value = "hi"
+                app.send_mentor_message()
+                assert app.loading is True
+                await app.workers.wait_for_complete()
+                await pilot.pause()
+                return app, app.query_one("#mentor_chat").text
+        
+        app, text = asyncio.run(run())
+        assert text == "\nYou: hi\nMentor: Hello"
+        assert app.loading is False
+        assert threads and threads[0] is not threading.main_thread()
+    
+    def test_superseded_reply_is_dropped(self):
+        """Test that chunks from an older message are ignored once a new one is sent."""
+        app = BanditCLIApp()
+        app._append_mentor_chat = Mock()
+        app._mentor_turn = 2
+        
+        app._append_mentor_reply(1, "stale")
+        app._append_mentor_reply(2, "fresh")
+        
+        app._append_mentor_chat.assert_called_once_with("fresh")
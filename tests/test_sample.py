@@ -5,6 +5,7 @@ def test_example():
     """A simple test to verify pytest is working."""
     assert 1 + 1 == 2
 
+@pytest.mark.xfail(strict=True, reason="meta-test verifying pytest reports failures")
 def test_example_failure():
     """A simple test that fails to verify error reporting. This test is expected to fail."""
     assert 1 + 1 == 3, "This test is designed to fail to verify that error reporting is working correctly"
\ No newline at end of file
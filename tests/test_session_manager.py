@@ -1,15 +1,15 @@
 """Unit tests for the session manager module."""
+import gc
+import weakref
 import pytest
+from unittest.mock import patch
 import os
 import json
 from pathlib import Path
 from datetime import datetime
 import sys
 
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-
-from session_manager import SessionManager, SessionInfo
+from src.session_manager import SessionManager, SessionInfo
 
 
 class TestSessionManager:
@@ -17,13 +17,18 @@ class TestSessionManager:
     
     def test_init_with_defaults(self, tmp_path):
         """Test initialization with default values."""
-        session_manager = SessionManager()
+        with patch('src.session_manager.Path.home', return_value=tmp_path):
+            session_manager = SessionManager()
         
-        # Check that sessions file directory was created
-        assert session_manager.sessions_file.parent.exists()
-        assert ".bandit_cli" in str(session_manager.sessions_file.parent)
+        assert session_manager.sessions_file == tmp_path / ".bandit_cli" / "sessions.json"
         assert session_manager.sessions == {}
         assert session_manager.current_session_id is None
+        
+        # The directory is only created once there is something to save
+        assert not session_manager.sessions_file.parent.exists()
+        session_manager.create_session("test_session", "Test Session", "test.host", 2220, "testuser", 0)
+        session_manager.flush()
+        assert session_manager.sessions_file.exists()
     
     def test_init_with_custom_file(self, tmp_path):
         """Test initialization with custom sessions file."""
@@ -99,6 +104,20 @@ class TestSessionManager:
         assert "session1" in session_ids
         assert "session2" in session_ids
     
+    def test_get_all_sessions_is_cached_until_membership_changes(self, tmp_path):
+        """Test that the session list is reused until a session is added or removed."""
+        session_manager = SessionManager(sessions_file=str(tmp_path / "sessions.json"))
+        session_manager.create_session("session1", "Session 1", "host1", 2220, "user1", 0)
+        
+        first = session_manager.get_all_sessions()
+        assert session_manager.get_all_sessions() is first
+        
+        session_manager.create_session("session2", "Session 2", "host2", 2221, "user2", 1)
+        assert [s.id for s in session_manager.get_all_sessions()] == ["session1", "session2"]
+        
+        session_manager.delete_session("session1")
+        assert [s.id for s in session_manager.get_all_sessions()] == ["session2"]
+    
     def test_update_session(self, tmp_path):
         """Test updating a session."""
         session_manager = SessionManager(sessions_file=str(tmp_path / "sessions.json"))
@@ -126,6 +145,18 @@ class TestSessionManager:
         # Check that last_used was updated
         assert session_info.last_used != initial_last_used
     
+    def test_update_session_ignores_unknown_fields(self, tmp_path):
+        """Test that only SessionInfo fields can be updated."""
+        session_manager = SessionManager(sessions_file=str(tmp_path / "sessions.json"))
+        session_manager.create_session("test_session", "Test Session", "test.host", 2220, "testuser", 0)
+        
+        session_manager.update_session("test_session", level=3, to_dict=None, _dict_cache={}, bogus=1)
+        
+        session_info = session_manager.get_session("test_session")
+        assert session_info.level == 3
+        assert session_info.to_dict()["level"] == 3
+        assert not hasattr(session_info, "bogus")
+    
     def test_delete_session(self, tmp_path):
         """Test deleting a session."""
         session_manager = SessionManager(sessions_file=str(tmp_path / "sessions.json"))
@@ -203,6 +234,7 @@ class TestSessionManager:
         session_manager1 = SessionManager(sessions_file=str(sessions_file))
         session_manager1.create_session("session1", "Session 1", "host1", 2220, "user1", 0)
         session_manager1.create_session("session2", "Session 2", "host2", 2221, "user2", 1)
+        session_manager1.flush()
         
         # Create second session manager to load sessions
         session_manager2 = SessionManager(sessions_file=str(sessions_file))
@@ -224,4 +256,70 @@ class TestSessionManager:
         assert session2.hostname == "host2"
         assert session2.port == 2221
         assert session2.username == "user2"
-        assert session2.level == 1
\ No newline at end of file
+        assert session2.level == 1
+    
+    def test_changes_are_saved_once(self, tmp_path):
+        """Test that a burst of changes is written in a single save."""
+        sessions_file = tmp_path / "sessions.json"
+        session_manager = SessionManager(sessions_file=str(sessions_file), save_delay=60)
+        
+        with patch.object(session_manager, '_save_sessions') as mock_save:
+            session_manager.create_session("session1", "Session 1", "host1", 2220, "user1", 0)
+            session_manager.set_current_session("session1")
+            session_manager.update_session("session1", level=3)
+            mock_save.assert_not_called()
+            
+            session_manager.flush()
+            session_manager.flush()
+        
+        mock_save.assert_called_once()
+        assert session_manager._save_timer is None
+    
+    def test_failed_save_keeps_previous_file(self, tmp_path, caplog):
+        """Test that a failed save leaves the old file intact and no temporary file."""
+        sessions_file = tmp_path / "sessions.json"
+        session_manager = SessionManager(sessions_file=str(sessions_file))
+        session_manager.create_session("session1", "Session 1", "host1", 2220, "user1", 0)
+        session_manager.flush()
+        saved = sessions_file.read_bytes()
+        
+        session_manager.create_session("session2", "Session 2", "host2", 2221, "user2", 1)
+        with patch('src.session_manager.os.replace', side_effect=OSError("disk full")):
+            session_manager.flush()
+        
+        assert sessions_file.read_bytes() == saved
+        assert list(tmp_path.iterdir()) == [sessions_file]
+        assert "Could not save sessions file: disk full" in caplog.text
+    
+    def test_manager_is_not_kept_alive_for_exit_flush(self, tmp_path):
+        """Test that registering for the exit-time flush does not keep the manager alive."""
+        session_manager = SessionManager(sessions_file=str(tmp_path / "sessions.json"))
+        session_manager.create_session("session1", "Session 1", "host1", 2220, "user1", 0)
+        session_manager.flush()
+        ref = weakref.ref(session_manager)
+        
+        del session_manager
+        gc.collect()
+        
+        assert ref() is None
+    
+    def test_to_dict_is_cached_until_changed(self):
+        """Test that the saved form of a session is rebuilt only after it changes."""
+        session_info = SessionInfo("s1", "Session 1", "t0", "t0", "host1", 2220, "user1")
+        
+        first = session_info.to_dict()
+        assert session_info.to_dict() is first
+        assert first == {"id": "s1", "name": "Session 1", "created_at": "t0", "last_used": "t0",
+                         "hostname": "host1", "port": 2220, "username": "user1", "level": 0}
+        
+        session_info.level = 4
+        assert session_info.to_dict()["level"] == 4
+    
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="slotted dataclasses need Python 3.10")
+    def test_session_info_has_no_instance_dict(self):
+        """Test that sessions are stored in slots rather than a per-instance dict."""
+        session_info = SessionInfo("s1", "Session 1", "t0", "t0", "host1", 2220, "user1")
+        
+        assert not hasattr(session_info, "__dict__")
+        session_info.level = 2
+        assert session_info.to_dict()["level"] == 2
@@ -0,0 +1,62 @@
+"""Unit tests for connecting to the SSH server from the app."""
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock
+
+from src.main import BanditCLIApp
+
+
+class TestSSHConnect:
+    """Test cases for BanditCLIApp.connect_ssh."""
+    
+    def _fill_login(self, app):
+        """Fill in the connection form with valid values."""
+        app.query_one("#ssh_username").value = "bandit0"
+        app.query_one("#ssh_password").value = "bandit0"
+        app.query_one("#ssh_port").value = "2220"
+        app.query_one("#ssh_timeout").value = "10"
+    
+    def test_connect_runs_in_worker_thread(self):
+        """Test that the blocking connect happens off the UI thread."""
+        threads = []
+        
+        def fake_create_connection(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return True
+        
+        async def run():
+            app = BanditCLIApp()
+            app.ssh_manager = Mock()
+            app.session_manager = Mock()
+            app.ssh_manager.create_connection.side_effect = fake_create_connection
+            async with app.run_test() as pilot:
+                self._fill_login(app)
+                app.connect_ssh()
+                assert app.query_one("#ssh_connect").disabled is True
+                await app.workers.wait_for_complete()
+                await pilot.pause()
+                return app
+        
+        app = asyncio.run(run())
+        assert app.ssh_connected is True
+        assert app.loading is False
+        assert threads and threads[0] is not threading.main_thread()
+    
+    def test_failed_connect_reenables_button(self):
+        """Test that the connect button is usable again after a failed attempt."""
+        async def run():
+            app = BanditCLIApp()
+            app.ssh_manager = Mock()
+            app.session_manager = Mock()
+            app.ssh_manager.create_connection.return_value = False
+            async with app.run_test() as pilot:
+                self._fill_login(app)
+                app.connect_ssh()
+                await app.workers.wait_for_complete()
+                await pilot.pause()
+                return app, app.query_one("#ssh_connect").disabled
+        
+        app, disabled = asyncio.run(run())
+        assert app.ssh_connected is False
+        assert disabled is False
@@ -1,96 +1,130 @@
 """Unit tests for the SSHManager class."""
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-import sys
-import os
+from unittest.mock import Mock, call, patch
 import paramiko
+import socket
+import threading
+import time
+from types import SimpleNamespace
 
-# Add the src directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from src.ssh_manager import SSHManager, SSHConnection
 
-from ssh_manager import SSHManager, SSHConnection
+# Expected calls for the standard test.host credentials, built once for the module
+_EXPECTED_CONNECTION_INIT = call(
+    "test.host", 2220, "testuser", "testpass",
+    notify_callback=None, timeout=10, keepalive_interval=30, send_delay=0.0,
+    client=None
+)
+_EXPECTED_CLIENT_CONNECT = call(
+    hostname="test.host", port=2220, username="testuser", password="testpass", timeout=10
+)
+
+
+class _FakeConnection:
+    """Compact stand-in for the connections in the disconnect_all scale test."""
+    __slots__ = ("client", "disconnect_calls")
+    
+    def __init__(self):
+        self.client = None
+        self.disconnect_calls = 0
+    
+    def disconnect(self):
+        self.disconnect_calls += 1
+
+
+@pytest.fixture
+def manager():
+    """Provide a fresh SSHManager for each test, dropping its mock connections afterwards."""
+    manager = SSHManager()
+    yield manager
+    manager.connections.clear()
+    manager._pool.clear()
+
+
+@pytest.fixture(scope="module")
+def conn_kwargs():
+    """Connection parameters shared by the SSHConnection tests."""
+    return dict(hostname="test.host", port=2220, username="testuser", password="testpass")
+
+
+@pytest.fixture
+def connection(conn_kwargs):
+    """Provide a fresh, unconnected SSHConnection for each test."""
+    return SSHConnection(**conn_kwargs)
+
+
+@pytest.fixture
+def mock_paramiko(monkeypatch):
+    """Replace the paramiko module seen by ssh_manager with a minimal stub.
+    
+    SSHClient() returns the same spec'd mock client each time; the exceptions are
+    the real ones so the except clauses in connect() still match.
+    """
+    stub = SimpleNamespace(
+        SSHClient=Mock(return_value=Mock(spec=paramiko.SSHClient)),
+        AutoAddPolicy=paramiko.AutoAddPolicy,
+        AuthenticationException=paramiko.AuthenticationException,
+        SSHException=paramiko.SSHException,
+    )
+    monkeypatch.setattr("src.ssh_manager.paramiko", stub)
+    return stub
 
 
 class TestSSHManager:
     """Test cases for the SSHManager class."""
     
-    def test_init(self):
+    def test_init(self, manager):
         """Test SSHManager initialization."""
-        manager = SSHManager()
         assert manager.connections == {}
     
-    def test_create_connection_success(self):
-        """Test successful creation of SSH connection."""
-        manager = SSHManager()
-        
-        # Mock the SSHConnection.connect method to return True
-        with patch('ssh_manager.SSHConnection.connect', return_value=True):
-            with patch('ssh_manager.SSHConnection') as mock_connection_class:
-                mock_connection_instance = Mock()
-                mock_connection_class.return_value = mock_connection_instance
-                mock_connection_instance.connect.return_value = True
-                
-                result = manager.create_connection(
-                    session_id="test_session",
-                    hostname="test.host",
-                    port=2220,
-                    username="testuser",
-                    password="testpass"
-                )
-                
-                assert result is True
-                assert "test_session" in manager.connections
-                mock_connection_class.assert_called_once_with(
-                    "test.host", 2220, "testuser", "testpass"
-                )
-    
-    def test_create_connection_failure(self):
-        """Test failed creation of SSH connection."""
-        manager = SSHManager()
-        
-        # Mock the SSHConnection.connect method to return False
-        with patch('ssh_manager.SSHConnection.connect', return_value=False):
-            with patch('ssh_manager.SSHConnection') as mock_connection_class:
-                mock_connection_instance = Mock()
-                mock_connection_class.return_value = mock_connection_instance
-                mock_connection_instance.connect.return_value = False
-                
-                result = manager.create_connection(
-                    session_id="test_session",
-                    hostname="test.host",
-                    port=2220,
-                    username="testuser",
-                    password="testpass"
-                )
-                
-                assert result is False
-                assert "test_session" not in manager.connections
-    
-    def test_get_connection_existing(self):
-        """Test getting an existing connection."""
-        manager = SSHManager()
+    @pytest.mark.parametrize("connect_result", [True, False], ids=["success", "failure"])
+    @patch('src.ssh_manager.SSHConnection')
+    def test_create_connection(self, mock_connection_class, manager, connect_result):
+        """Test that only successful SSH connections are kept."""
+        mock_connection_class.return_value.connect.return_value = connect_result
         
-        # Create a mock connection and add it to the manager
-        mock_connection = Mock()
-        manager.connections["test_session"] = mock_connection
+        result = manager.create_connection(
+            session_id="test_session",
+            hostname="test.host",
+            port=2220,
+            username="testuser",
+            password="testpass"
+        )
+        
+        assert result is connect_result
+        assert ("test_session" in manager.connections) is connect_result
+        assert mock_connection_class.call_args_list == [_EXPECTED_CONNECTION_INIT]
+    
+    @patch('src.ssh_manager.SSHConnection')
+    def test_connection_finished_after_disconnect_all_is_closed(self, mock_connection_class, manager):
+        """Test that a connect completing after shutdown does not leave a live session behind."""
+        connection = mock_connection_class.return_value
+        connection.connect.return_value = True
+        manager.disconnect_all()
+        
+        result = manager.create_connection("test_session", "test.host", 2220, "testuser", "testpass")
+        
+        assert result is False
+        assert manager.connections == {}
+        connection.disconnect.assert_called_once()
+    
+    def test_get_connection_existing(self, manager):
+        """Test getting an existing connection."""
+        # Only identity is checked, so a bare object stands in for the connection
+        connection = SimpleNamespace()
+        manager.connections["test_session"] = connection
         
         result = manager.get_connection("test_session")
-        assert result == mock_connection
+        assert result is connection
     
-    def test_get_connection_non_existing(self):
+    def test_get_connection_non_existing(self, manager):
         """Test getting a non-existing connection."""
-        manager = SSHManager()
-        
         result = manager.get_connection("non_existing_session")
         assert result is None
     
-    def test_disconnect_session(self):
+    def test_disconnect_session(self, manager):
         """Test disconnecting a session."""
-        manager = SSHManager()
-        
-        # Create a mock connection with a disconnect method
-        mock_connection = Mock()
-        mock_connection.disconnect = Mock()
+        mock_connection = Mock(spec=SSHConnection, client=None)
         manager.connections["test_session"] = mock_connection
         
         manager.disconnect_session("test_session")
@@ -99,47 +133,124 @@ class TestSSHManager:
         mock_connection.disconnect.assert_called_once()
         assert "test_session" not in manager.connections
     
-    def test_disconnect_all(self):
+    @pytest.mark.parametrize("count", [2, 16, 256])
+    def test_disconnect_all(self, manager, count):
         """Test disconnecting all sessions."""
-        manager = SSHManager()
+        connections = [_FakeConnection() for _ in range(count)]
+        manager.connections.update(
+            (f"session{index}", connection) for index, connection in enumerate(connections)
+        )
         
-        # Create mock connections with disconnect methods
-        mock_connection1 = Mock()
-        mock_connection1.disconnect = Mock()
-        mock_connection2 = Mock()
-        mock_connection2.disconnect = Mock()
+        manager.disconnect_all()
         
-        manager.connections["session1"] = mock_connection1
-        manager.connections["session2"] = mock_connection2
+        assert all(connection.disconnect_calls == 1 for connection in connections)
+        assert manager.connections == {}
+    
+    def test_disconnect_all_continues_after_failure(self, manager):
+        """Test that one failing disconnect does not leave other sessions open."""
+        failing = Mock()
+        failing.disconnect.side_effect = OSError("socket closed")
+        other = Mock()
+        manager.connections["session1"] = failing
+        manager.connections["session2"] = other
         
         manager.disconnect_all()
         
-        # Verify the disconnect methods were called and connections were removed
-        mock_connection1.disconnect.assert_called_once()
-        mock_connection2.disconnect.assert_called_once()
+        failing.disconnect.assert_called_once()
+        other.disconnect.assert_called_once()
         assert manager.connections == {}
+    
+    def _pooled_connection(self, username="testuser", password="testpass"):
+        """Build a mock connection whose transport is still up."""
+        connection = Mock(hostname="test.host", port=2220, username=username, password=password)
+        connection.is_reusable.return_value = True
+        connection.reopen.return_value = True
+        return connection
+    
+    def test_release_session_pools_connection(self, manager):
+        """Test that releasing a session keeps its connection for reuse."""
+        connection = self._pooled_connection()
+        manager.connections["test_session"] = connection
+        
+        manager.release_session("test_session")
+        
+        connection.release.assert_called_once()
+        connection.disconnect.assert_not_called()
+        assert "test_session" not in manager.connections
+        
+        # Reconnecting with the same login reuses it without a new handshake
+        with patch('src.ssh_manager.SSHConnection') as mock_connection_class:
+            result = manager.create_connection("test_session", "test.host", 2220, "testuser", "testpass")
+        
+        assert result is True
+        mock_connection_class.assert_not_called()
+        connection.reopen.assert_called_once()
+        assert manager.connections["test_session"] is connection
+    
+    def test_pooled_connection_not_reused_with_other_password(self, manager):
+        """Test that a pooled connection is closed rather than reused for different credentials."""
+        connection = self._pooled_connection()
+        manager.connections["test_session"] = connection
+        manager.release_session("test_session")
+        
+        with patch('src.ssh_manager.SSHConnection') as mock_connection_class:
+            mock_connection_class.return_value.connect.return_value = True
+            manager.create_connection("test_session", "test.host", 2220, "testuser", "other")
+        
+        connection.disconnect.assert_called_once()
+        mock_connection_class.assert_called_once()
+    
+    def test_pool_evicts_least_recently_used(self):
+        """Test that the pool closes the oldest connection when full."""
+        manager = SSHManager(pool_size=1)
+        first = self._pooled_connection(username="bandit0")
+        second = self._pooled_connection(username="bandit1")
+        manager.connections["s1"] = first
+        manager.connections["s2"] = second
+        
+        manager.release_session("s1")
+        manager.release_session("s2")
+        
+        first.disconnect.assert_called_once()
+        second.disconnect.assert_not_called()
+        
+        # Closing everything also closes pooled connections
+        manager.disconnect_all()
+        second.disconnect.assert_called_once()
+    
+    def test_sessions_share_transport(self, manager):
+        """Test that a second session for the same login opens a channel on the existing client."""
+        first = self._pooled_connection()
+        manager.connections["s1"] = first
+    
+        with patch('src.ssh_manager.SSHConnection') as mock_connection_class:
+            second = mock_connection_class.return_value
+            second.connect.return_value = True
+            manager.create_connection("s2", "test.host", 2220, "testuser", "testpass")
+    
+        assert mock_connection_class.call_args.kwargs["client"] is first.client
+    
+        # Closing one session keeps the shared client open for the other
+        second.client = first.client
+        manager.disconnect_session("s2")
+        second.release.assert_called_once()
+        second.disconnect.assert_not_called()
 
 
 class TestSSHConnection:
     """Test cases for the SSHConnection class."""
     
-    @patch('ssh_manager.paramiko')
-    def test_connect_success(self, mock_paramiko):
+    def test_connect_success(self, mock_paramiko, connection):
         """Test successful SSH connection."""
         # Setup mocks
-        mock_client = Mock()
-        mock_paramiko.SSHClient.return_value = mock_client
-        mock_channel = Mock()
+        mock_client = mock_paramiko.SSHClient.return_value
+        mock_channel = Mock(spec=paramiko.Channel)
         mock_client.invoke_shell.return_value = mock_channel
+        # The shared selector needs a real file descriptor to watch
+        local, remote = socket.socketpair()
+        mock_channel.fileno.return_value = local.fileno()
         
         # Create SSHConnection instance
-        connection = SSHConnection(
-            hostname="test.host",
-            port=2220,
-            username="testuser",
-            password="testpass"
-        )
-        
         # Call connect method
         result = connection.connect()
         
@@ -152,35 +263,35 @@ class TestSSHConnection:
         # Verify method calls
         mock_paramiko.SSHClient.assert_called_once()
         mock_client.set_missing_host_key_policy.assert_called_once()
-        mock_client.connect.assert_called_once_with(
-            hostname="test.host",
-            port=2220,
-            username="testuser",
-            password="testpass",
-            timeout=10
-        )
+        assert mock_client.connect.call_args_list == [_EXPECTED_CLIENT_CONNECT]
         mock_client.invoke_shell.assert_called_once()
-        mock_channel.settimeout.assert_called_once_with(0.1)
+        mock_channel.settimeout.assert_not_called()
+        
+        connection.disconnect()
+        local.close()
+        remote.close()
     
-    @patch('ssh_manager.paramiko')
-    def test_connect_failure(self, mock_paramiko):
+    def test_connect_with_shared_client(self, mock_paramiko, conn_kwargs):
+        """Test that a connection given a live client only opens a shell channel."""
+        shared_client = Mock(spec=paramiko.SSHClient)
+        local, remote = socket.socketpair()
+        shared_client.invoke_shell.return_value.fileno.return_value = local.fileno()
+        connection = SSHConnection(**conn_kwargs, client=shared_client)
+        
+        assert connection.connect() is True
+        mock_paramiko.SSHClient.assert_not_called()
+        shared_client.invoke_shell.assert_called_once()
+        connection.disconnect()
+        local.close()
+        remote.close()
+    
+    def test_connect_failure(self, mock_paramiko, connection):
         """Test failed SSH connection."""
         # Setup mock to raise a generic exception
-        mock_client = Mock()
-        mock_paramiko.SSHClient.return_value = mock_client
-        # Properly mock the paramiko exceptions
-        mock_paramiko.AuthenticationException = paramiko.AuthenticationException
-        mock_paramiko.SSHException = paramiko.SSHException
+        mock_client = mock_paramiko.SSHClient.return_value
         mock_client.connect.side_effect = Exception("Connection failed")
         
         # Create SSHConnection instance
-        connection = SSHConnection(
-            hostname="test.host",
-            port=2220,
-            username="testuser",
-            password="testpass"
-        )
-        
         # Call connect method
         result = connection.connect()
         
@@ -190,62 +301,178 @@ class TestSSHConnection:
         # Note: connection.client is not None because it's set before the exception occurs
         # but the connection is not established
     
-    def test_send_command_when_connected(self):
-        """Test sending a command when connected."""
-        # Create SSHConnection instance
-        connection = SSHConnection(
-            hostname="test.host",
-            port=2220,
-            username="testuser",
-            password="testpass"
-        )
+    @patch('src.ssh_manager.time.sleep')
+    def test_retries_reuse_client(self, mock_sleep, mock_paramiko, conn_kwargs):
+        """Test that a retried login reuses the client built for the first attempt."""
+        mock_client = mock_paramiko.SSHClient.return_value
+        mock_client.connect.side_effect = Exception("Connection failed")
+        connection = SSHConnection(**conn_kwargs, notify_callback=Mock())
         
-        # Set up connection state
-        connection.connected = True
-        connection.channel = Mock()
+        assert connection.connect(retries=3) is False
         
-        # Send a command
-        connection.send_command("ls -la")
+        mock_paramiko.SSHClient.assert_called_once()
+        assert mock_client.connect.call_count == 3
+        # Closed after every failed attempt, including the last
+        assert mock_client.close.call_count == 3
+        assert connection.client is None
+    
+    def test_failed_shell_closes_client(self, mock_paramiko, connection):
+        """Test that a login whose shell never opens does not leave the transport open."""
+        mock_client = mock_paramiko.SSHClient.return_value
+        mock_client.invoke_shell.side_effect = paramiko.SSHException("channel refused")
+        
+        assert connection.connect(retries=2) is False
         
-        # Verify the command was sent
-        connection.channel.send.assert_called_once_with("ls -la")
+        assert mock_client.connect.call_count == 1
+        mock_client.close.assert_called_once()
+        assert connection.client is None
     
-    def test_send_command_when_not_connected(self):
-        """Test sending a command when not connected."""
-        # Create SSHConnection instance
-        connection = SSHConnection(
-            hostname="test.host",
-            port=2220,
-            username="testuser",
-            password="testpass"
-        )
+    def test_authentication_failure_closes_client(self, mock_paramiko, connection):
+        """Test that a rejected login closes its client without retrying."""
+        mock_client = mock_paramiko.SSHClient.return_value
+        mock_client.connect.side_effect = paramiko.AuthenticationException()
         
-        # Ensure not connected
-        connection.connected = False
-        connection.channel = Mock()
+        assert connection.connect() is False
+        
+        mock_client.close.assert_called_once()
+        assert connection.client is None
+    
+    def test_report_logs_without_notify_callback(self, caplog, connection):
+        """Test that messages are logged when no notify callback is set."""
+        connection._report("Retrying connection... (1/2)", "warning")
+        
+        assert caplog.records[-1].levelname == "WARNING"
+        assert caplog.records[-1].getMessage() == "Retrying connection... (1/2)"
+    
+    @pytest.mark.parametrize("connected", [True, False], ids=["connected", "disconnected"])
+    def test_send_command(self, connection, connected):
+        """Test that a command is only sent while connected."""
+        connection.connected = connected
+        connection.channel = Mock(spec=paramiko.Channel)
         
-        # Send a command
         connection.send_command("ls -la")
         
-        # Verify the command was not sent
+        if connected:
+            connection.channel.send.assert_called_once_with("ls -la")
+        else:
+            connection.channel.send.assert_not_called()
+    
+    def test_send_delay_coalesces_commands(self, conn_kwargs):
+        """Test that commands sent within the delay go out in a single write."""
+        connection = SSHConnection(**conn_kwargs, send_delay=60)
+        connection.connected = True
+        connection.channel = Mock(spec=paramiko.Channel)
+        
+        connection.send_command("cd /tmp\n")
+        connection.send_command("ls\n")
+        connection.channel.sendall.assert_not_called()
+        
+        connection.flush()
+        connection.channel.sendall.assert_called_once_with(b"cd /tmp\nls\n")
         connection.channel.send.assert_not_called()
     
-    def test_disconnect(self):
+    def test_send_buffer_flushes_when_full(self, conn_kwargs):
+        """Test that a full send buffer is written without waiting for the timer."""
+        connection = SSHConnection(**conn_kwargs, send_delay=60)
+        connection.connected = True
+        connection.channel = Mock(spec=paramiko.Channel)
+        
+        connection.send_command("x" * 5000)
+        
+        connection.channel.sendall.assert_called_once_with(b"x" * 5000)
+        assert connection._send_timer is None
+    
+    def test_reader_waits_for_data_and_stops_at_eof(self, conn_kwargs):
+        """Test that the reader passes on data as it arrives and stops when the server closes."""
+        local, remote = socket.socketpair()
+        notify = Mock()
+        received = []
+        connection = SSHConnection(**conn_kwargs, notify_callback=notify)
+        connection.channel = local
+        connection.connected = True
+        connection.set_output_callback(received.append)
+        
+        connection.start_reading()
+        remote.sendall(b"hello")
+        remote.close()
+        deadline = time.monotonic() + 2
+        while connection.connected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        local.close()
+        
+        assert received == [b"hello"]
+        assert connection.connected is False
+        notify.assert_called_once_with("SSH session closed by the server", "warning")
+    
+    def test_connections_share_one_reader_thread(self):
+        """Test that output from several channels is read by a single selector thread."""
+        pairs = [socket.socketpair() for _ in range(3)]
+        threads = set()
+        received = []
+        connections = []
+        for index, (local, _) in enumerate(pairs):
+            connection = SSHConnection("test.host", 2220, f"bandit{index}", "testpass")
+            connection.channel = local
+            connection.connected = True
+            connection.set_output_callback(
+                lambda data: (threads.add(threading.current_thread()), received.append(data))
+            )
+            connection.start_reading()
+            connections.append(connection)
+        
+        for _, remote in pairs:
+            remote.sendall(b"x")
+        deadline = time.monotonic() + 2
+        while len(received) < len(pairs) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        for connection in connections:
+            connection.disconnect()
+        for local, remote in pairs:
+            remote.close()
+        
+        assert received == [b"x"] * len(pairs)
+        assert len(threads) == 1
+        assert threads.pop() is not threading.main_thread()
+    
+    def test_callback_error_only_stops_its_connection(self, conn_kwargs):
+        """Test that a raising output callback does not stop the shared reader for others."""
+        (bad_local, bad_remote), (good_local, good_remote) = socket.socketpair(), socket.socketpair()
+        received = []
+        bad = SSHConnection(**conn_kwargs)
+        bad.channel = bad_local
+        bad.connected = True
+        bad.set_output_callback(Mock(side_effect=RuntimeError("app is not running")))
+        good = SSHConnection(**conn_kwargs)
+        good.channel = good_local
+        good.connected = True
+        good.set_output_callback(received.append)
+        bad.start_reading()
+        good.start_reading()
+        
+        bad_remote.sendall(b"x")
+        deadline = time.monotonic() + 2
+        while not bad.stop_reading and time.monotonic() < deadline:
+            time.sleep(0.01)
+        good_remote.sendall(b"still here")
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        good.disconnect()
+        for sock in (bad_local, bad_remote, good_local, good_remote):
+            sock.close()
+        
+        assert bad.stop_reading is True
+        assert received == [b"still here"]
+    
+    def test_disconnect(self, connection):
         """Test disconnecting SSH connection."""
         # Create SSHConnection instance
-        connection = SSHConnection(
-            hostname="test.host",
-            port=2220,
-            username="testuser",
-            password="testpass"
-        )
-        
         # Set up connection state
         connection.connected = True
         connection.stop_reading = False
-        connection.channel = Mock()
-        connection.client = Mock()
-        connection.read_thread = Mock()
+        connection.channel = Mock(spec=paramiko.Channel)
+        connection.client = Mock(spec=paramiko.SSHClient)
         
         # Call disconnect
         connection.disconnect()
@@ -255,6 +482,5 @@ class TestSSHConnection:
         assert connection.connected is False
         
         # Verify cleanup methods were called
-        connection.read_thread.join.assert_called_once_with(timeout=1)
         connection.channel.close.assert_called_once()
         connection.client.close.assert_called_once()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""Unit tests for writing SSH output to the terminal view."""
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+
+from textual.widgets import LoadingIndicator, Log, TabbedContent
+
+from src.main import BanditCLIApp
+
+
+class TestTerminalOutput:
+    """Test cases for BanditCLIApp.on_ssh_output."""
+    
+    def test_output_is_batched_into_one_write(self):
+        """Test that a burst of output schedules a single flush."""
+        app = BanditCLIApp()
+        app.set_timer = Mock()
+        
+        app.on_ssh_output(b"a")
+        app.on_ssh_output(b"b")
+        app.on_ssh_output(b"c")
+        
+        app.set_timer.assert_called_once()
+        assert app._pending_output == [b"a", b"b", b"c"]
+    
+    def test_flush_appends_and_trims_scrollback(self):
+        """Test that flushed output is appended and old lines are dropped."""
+        async def run():
+            app = BanditCLIApp()
+            async with app.run_test() as pilot:
+                terminal = app.query_one("#terminal_output", Log)
+                terminal.max_lines = 5
+                for i in range(8):
+                    app.on_ssh_output(f"line{i}\n".encode())
+                await pilot.pause(0.1)
+                return "\n".join(terminal.lines)
+        
+        text = asyncio.run(run())
+        assert text == "line4\nline5\nline6\nline7\n"
+    
+    def test_split_utf8_sequence_is_decoded(self):
+        """Test that a multi-byte character split across flushes is kept intact."""
+        app = BanditCLIApp()
+        app.set_timer = Mock()
+        terminal = Mock()
+        app._widgets["#terminal_output"] = terminal
+        encoded = "é".encode()
+        
+        app.on_ssh_output(b"caf" + encoded[:1])
+        app._flush_terminal()
+        app.on_ssh_output(encoded[1:])
+        app._flush_terminal()
+        
+        written = "".join(call.args[0] for call in terminal.write.call_args_list)
+        assert written == "café"
+        assert "".join(app.terminal_output) == "café"
+    
+    def test_new_connection_resets_decoder(self):
+        """Test that a partial character from a closed session is not carried into the next one."""
+        app = BanditCLIApp()
+        app.set_timer = Mock()
+        app.notify = Mock()
+        terminal = Mock()
+        app._widgets["#terminal_output"] = terminal
+        app.__dict__["ssh_manager"] = Mock()
+        
+        app.on_ssh_output("é".encode()[:1])
+        app._flush_terminal()
+        app._finish_ssh_connect(True)
+        app.on_ssh_output(b"ok")
+        app._flush_terminal()
+        
+        written = "".join(call.args[0] for call in terminal.write.call_args_list)
+        assert written == "ok"
+
+
+class TestWidgetCache:
+    """Test cases for BanditCLIApp._widget."""
+    
+    def test_widget_is_queried_once(self):
+        """Test that repeated lookups of a widget reuse the first query."""
+        app = BanditCLIApp()
+        
+        with patch.object(app, 'query_one') as mock_query:
+            first = app._widget("#terminal_output", Mock)
+            second = app._widget("#terminal_output", Mock)
+        
+        assert first is second
+        mock_query.assert_called_once_with("#terminal_output", Mock)
+    
+    def test_loading_indicators_collected_on_mount(self):
+        """Test that loading toggles the indicators collected at mount."""
+        async def run():
+            app = BanditCLIApp()
+            async with app.run_test() as pilot:
+                app.loading = True
+                await pilot.pause()
+                indicators = app._loading_indicators
+                assert list(indicators) == list(app.query(LoadingIndicator))
+                return len(indicators), all(indicator.display for indicator in indicators)
+        
+        count, displayed = asyncio.run(run())
+        assert count == 2
+        assert displayed
+
+    
+    def test_tab_hotkeys_switch_tabs(self):
+        """Test that the number keys switch tabs through the cached TabbedContent."""
+        async def run():
+            app = BanditCLIApp()
+            async with app.run_test() as pilot:
+                app.set_focus(None)
+                await pilot.press("2")
+                after_two = app.query_one(TabbedContent).active
+                await pilot.press("3")
+                return after_two, app.query_one(TabbedContent).active
+        
+        assert asyncio.run(run()) == ("level", "mentor")
+
+class TestButtonDispatch:
+    """Test cases for BanditCLIApp.on_button_pressed."""
+    
+    def test_dispatch_targets_exist(self):
+        """Test that every dispatched button maps to an app method."""
+        for handler in BanditCLIApp._BUTTON_DISPATCH.values():
+            assert callable(getattr(BanditCLIApp, handler))
+    
+    def test_button_calls_handler(self):
+        """Test that a button press calls the mapped handler and ignores unknown ids."""
+        app = BanditCLIApp()
+        app.next_level = Mock()
+        
+        app.on_button_pressed(Mock(button=Mock(id="next_level")))
+        app.on_button_pressed(Mock(button=Mock(id="unknown")))
+        
+        app.next_level.assert_called_once_with()
+
+
+class TestLazyServices:
+    """Test cases for the lazily created SSH manager and AI mentor."""
+    
+    def test_services_created_on_first_use(self):
+        """Test that the SSH manager and AI mentor are built once, on first access."""
+        app = BanditCLIApp()
+        assert "ssh_manager" not in app.__dict__
+        assert "ai_mentor" not in app.__dict__
+        
+        assert app.ssh_manager is app.ssh_manager
+        assert app.ai_mentor is app.ai_mentor